@@ -0,0 +1,99 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" Time the JSON decoders in ezyvet.decoder on recorded pages, next to the
+    old getPage path (str(r.content) for the debug log, then json.loads on
+    r.text). Pages saved by an export (HOME_DIR/exports/<key>/page-*.json)
+    make good recordings; without any, pages of invoice-like records are
+    made up.
+
+    Usage:
+        python3 benchmarks/json_benchmark.py [page files or directories]
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ezyvet.decoder import installed
+
+
+def recorded(paths):
+    """ The bytes of each recorded page, wrapped like an API response. """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "page-*.json"))))
+        else:
+            files.append(path)
+    pages = []
+    for name in files:
+        with open(name, "rb") as f:
+            items = json.loads(f.read())
+        pages.append(json.dumps({"meta": {"items_page_total": len(files)}, "messages": [], "items": items}).encode("utf-8"))
+    return pages
+
+
+def madeUp(count=200, records=100):
+    """ Pages of invoice-like records, the shape of a wide ezyVet page. """
+    pages = []
+    for page in range(count):
+        items = []
+        for n in range(records):
+            id = page * records + n + 1
+            items.append({"invoice": {
+                "id": str(id), "active": "1", "created_at": str(1540000000 + id), "modified_at": str(1540000000 + id),
+                "invoice_number": "INV" + str(id), "date": str(1540000000 + id), "contact_id": str(id % 977),
+                "consult_id": str(id), "status": "Active", "total": "%d.%02d" % (id % 500, id % 100),
+                "comment": "Follow up in two weeks, recheck bloods " * 3,
+                "items": [{"product_id": str(id % 31), "quantity": "1.000", "price": "12.50"}] * 3}})
+        pages.append(json.dumps({"meta": {"items_page_total": count}, "messages": [], "items": items}).encode("utf-8"))
+    return pages
+
+
+def old(body):
+    """ What getPage used to do with each page. """
+    str(body)                                       # debug log, built even when debug is off
+    return json.loads(body.decode("utf-8"))         # r.text then json.loads
+
+
+def timeIt(loads, pages, rounds=5):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for body in pages:
+            loads(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    pages = recorded(sys.argv[1:]) if len(sys.argv) > 1 else madeUp()
+    size = sum(len(body) for body in pages)
+    print("%d pages, %.1f MB" % (len(pages), size / 1e6))
+    base = timeIt(old, pages)
+    print("%-28s %8.3fs" % ("old path (str + r.text)", base))
+    for name, loads in sorted(installed().items()):
+        elapsed = timeIt(loads, pages)
+        print("%-28s %8.3fs %6.2fx" % (name + " from bytes", elapsed, base / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" Compare a 500 page pull made with a new connection per request (how
+    getData used to call requests.request) against the pooled session the
+    ezyvet class now uses. Every new connection is a TCP handshake here and a
+    TCP+TLS handshake against the real API. The last line is the same pull
+    with 200 record pages (the PAGE_SIZE setting) instead of 10.
+
+    Usage:
+        python3 benchmarks/session_benchmark.py [pages]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ezyvet import ezyvet
+from stubserver import StubServer, stubSettings
+
+
+def unpooled(url, pages):
+    """ One requests.request call (and so one connection) per page. """
+    headers = {"authorization": "Bearer stub", 'Cache-Control': "no-cache"}
+    for page in range(1, pages + 1):
+        requests.request("GET", url + "/invoiceline?page=" + str(page), headers=headers).json()
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger(__name__)
+
+    with StubServer(pages=pages) as stub, tempfile.TemporaryDirectory() as home:
+        start = time.perf_counter()
+        unpooled(stub.url, pages)
+        elapsed = time.perf_counter() - start
+        print("requests.request  : %5d requests %5d new connections %8.3fs" % (stub.requests, stub.connections, elapsed))
+
+        settings = stubSettings(stub.url, home)
+        settings["PAGE_SIZE"] = 10                      # same pages as above, only the connections differ
+        e = ezyvet.ezyvet(settings, logger)
+        for workers in (1, 4):
+            stub.reset()
+            start = time.perf_counter()
+            items = e.getData("/invoiceline", maxpages=pages, workers=workers)
+            elapsed = time.perf_counter() - start
+            print("pooled, %d worker  : %5d requests %5d new connections %8.3fs (%d records)" % (workers, stub.requests, stub.connections, elapsed, len(items)))
+
+        e.settings["PAGE_SIZE"] = 200                   # the API maximum, what the client asks for by default
+        stub.reset()
+        start = time.perf_counter()
+        items = e.getData("/invoiceline", maxrecords=pages * 10, workers=4)
+        elapsed = time.perf_counter() - start
+        print("pooled, 200/page  : %5d requests %5d new connections %8.3fs (%d records)" % (stub.requests, stub.connections, elapsed, len(items)))
+
+
+if __name__ == "__main__":
+    main()
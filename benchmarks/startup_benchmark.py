@@ -0,0 +1,86 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" Time how long ezyvet_cli.py takes to start, and list the slowest imports
+    python -X importtime reports for it. Each command is run several times
+    in a fresh interpreter and the median wall time is kept, next to a bare
+    "python -c pass" so the interpreter's own startup (site packages and
+    .pth files) can be told apart from ours. Exits 1 when --help is over
+    the target.
+
+    Usage:
+        python3 benchmarks/startup_benchmark.py [runs] [target ms]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CLI = os.path.join(ROOT, "ezyvet_cli.py")
+
+COMMANDS = [
+    ("python -c pass", ["-c", "pass"]),
+    ("ezyvet_cli.py --help", [CLI, "--help"]),
+    ("import ezyvet.ezyvet", ["-c", "import ezyvet.ezyvet"]),
+]
+
+
+def wallTime(args, runs):
+    """ Median seconds to run python with args. """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def slowestImports(args, count=10):
+    """ (cumulative microseconds, module) for the top level imports of a run. """
+    r = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):                  # top level, nested ones are counted in their parent
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 11
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    results = {}
+    for label, args in COMMANDS:
+        results[label] = wallTime(args, runs) * 1000
+    bare = results["python -c pass"]
+    print("%-24s %10s %12s" % ("command", "median ms", "over python"))
+    for label, ms in results.items():
+        print("%-24s %10.1f %12.1f" % (label, ms, ms - bare))
+
+    print("\nslowest imports for ezyvet_cli.py --help (cumulative ms):")
+    for us, name in slowestImports([CLI, "--help"]):
+        print("  %8.1f  %s" % (us / 1000, name))
+
+    help = results["ezyvet_cli.py --help"]
+    if help > target:
+        print("\n--help took %.1f ms, the target is %.0f ms." % (help, target))
+        sys.exit(1)
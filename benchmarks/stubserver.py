@@ -0,0 +1,134 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" A tiny local stand-in for the ezyVet API used by the benchmarks. It hands
+    out a token, answers the token test and serves any resource as PAGES pages
+    of 10 records each, or fewer larger pages of the same records when a
+    limit is asked for. It counts the connections it accepts so benchmarks can
+    show how many handshakes a run cost.
+"""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"           # keep-alive, like the real API
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # headers and body go out separately
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass                                # keep benchmark output readable
+
+    def sendJson(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.sendJson({"access_token": "stub", "token_type": "Bearer", "expires_in": 3600})
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        url = urlparse(self.path)
+        resource = url.path.rsplit("/", 1)[-1]
+        query = parse_qs(url.query)
+        page = int(query.get("page", ["1"])[-1])
+        limit = min(int(query.get("limit", ["10"])[-1]), 200)
+        total = self.server.pages * 10
+        pages = -(-total // limit)
+        items = []
+        for n in range(limit):
+            id = (page - 1) * limit + n + 1
+            if id > total:
+                break
+            items.append({resource: {"id": str(id), "modified_at": str(1540000000 + id), "name": resource + " " + str(id)}})
+        self.sendJson({
+            "meta": {"timestamp": 1540000000, "items_page_total": pages, "items_page": page, "items_total": total},
+            "messages": [],
+            "items": items
+        })
+
+
+class StubServer:
+    """ Run the stub API on a free localhost port in a background thread.
+
+        Parameters
+        ----------
+        pages : int
+            How many pages every resource reports.
+    """
+
+    def __init__(self, pages=500):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.pages = pages
+        self.url = "http://127.0.0.1:" + str(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        """ Zero the connection and request counters. """
+        with self.httpd.lock:
+            self.httpd.connections = 0
+            self.httpd.requests = 0
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+
+def stubSettings(url, home_dir):
+    """ Settings that point an ezyvet client at the stub server. """
+    return {
+        "PROD_URL": url,
+        "SAND_URL": url,
+        "PARTNER_ID": "stub",
+        "CLIENT_ID": "stub",
+        "CLIENT_SECRET": "stub",
+        "CLIENT_ID_SAND": "stub",
+        "CLIENT_SECRET_SAND": "stub",
+        "HOME_DIR": home_dir,
+        "USE_CACHE": False,
+        "SCOPE": ["read-invoiceline"],
+    }
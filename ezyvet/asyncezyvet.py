@@ -0,0 +1,500 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import asyncio
+import json
+import logging
+import os
+import textwrap
+from pprint import pformat
+try:
+    import aiohttp                      # optional, only needed for the asyncio client
+except ImportError:
+    aiohttp = None
+try:
+    from ezyvet.ezhelpers import writeJson
+    from ezyvet.resources import ENDPOINTS
+    from ezyvet.tokenmanager import TokenManager
+    from ezyvet.ratelimiter import RateLimiter, backoffDelay, retryAfter
+    from ezyvet.decoder import decoder
+    from ezyvet.query import Query, pageSize, MAX_LIMIT
+    from ezyvet.localstore import project
+except ImportError:
+    from .ezhelpers import writeJson
+    from .resources import ENDPOINTS
+    from .tokenmanager import TokenManager
+    from .ratelimiter import RateLimiter, backoffDelay, retryAfter
+    from .decoder import decoder
+    from .query import Query, pageSize, MAX_LIMIT
+    from .localstore import project
+
+class AsyncEzyvet:
+    """
+    asyncio client for the ezyVet API. It covers the same endpoints as the
+    ezyvet class and reads and writes the same token file, so both clients
+    can run side by side. All requests share one aiohttp connection pool.
+
+    Use it as an async context manager:
+
+        async with AsyncEzyvet(SETTINGS, logger) as e:
+            animals, contacts = await asyncio.gather(
+                e.getAnimal({"name": "foo"}),
+                e.getContact({"id": 104834}))
+            async for line in e.iterInvoiceLine({"invoice_id": 50003}, maxpages=30):
+                ...
+
+    Attributes
+    ----------
+    settings : static settings
+        Data from the settings file
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    sandbox : Bool, optional
+        Are we going to use the sandbox or production API
+
+    Methods
+    -------
+    open()
+        Open the connection pool and load, fetch or test the access token.
+
+    close()
+        Close the connection pool.
+
+    getData(url, filter, maxpages)
+        Get all of the records from an endpoint as a list.
+
+    iterData(url, filter, maxpages)
+        Async generator of the records from an endpoint as pages arrive.
+        Each getX() coroutine has a matching iterX() async generator.
+    """
+
+    def __init__(self, settings, logger, sandbox=False):
+        """
+        Parameters
+        ----------
+        settings : static settings
+            Data from the settings file
+        logger : the logger session
+            It makes more consistant logs to pass a logger session to the class
+        sandbox : Bool, optional
+            Are we going to use the sandbox or production API
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.settings = settings
+        self.s = None
+        self.token = None
+
+        if sandbox is False:
+            self.url = settings["PROD_URL"]
+            self.client_id = settings['CLIENT_ID']
+            self.client_secret = settings['CLIENT_SECRET']
+        else:
+            self.url = settings["SAND_URL"]
+            self.client_id = settings['CLIENT_ID_SAND']
+            self.client_secret = settings['CLIENT_SECRET_SAND']
+        self.partner_id = settings['PARTNER_ID']
+        self.scope = ','.join(settings['SCOPE'])    # make the list into a comma seperated string
+        self.home_dir = str(settings['HOME_DIR'])
+        if self.home_dir[-1:] not in ("/", "\\"):
+            if '\\' in self.home_dir:
+                self.home_dir = self.home_dir + '\\'     # for windows users
+            else:
+                self.home_dir = self.home_dir + '/'
+        self.tokens = TokenManager(self.home_dir, self.logger, int(settings.get("TOKEN_REFRESH_MARGIN", 300)))
+        self.token_lock = None
+        self.cache = None
+        if settings.get("USE_CACHE") is True:                                   # same cache file as the ezyvet class
+            try:                                                                # sqlite3 is only loaded when it's used
+                from ezyvet.cache import ResponseCache
+            except ImportError:
+                from .cache import ResponseCache
+            os.makedirs(self.home_dir, exist_ok=True)
+            self.cache = ResponseCache(self.home_dir + "api_cache.sqlite3", settings.get("CACHE_EXPIRE", 300), settings.get("CACHE_TTLS"),
+                                       int(settings.get("CACHE_MAX_ENTRIES", 10000)), self.logger, self.url)
+        self.limiter = None
+        if settings.get("RATE_LIMIT"):                                          # same budget as the ezyvet class
+            self.limiter = RateLimiter(settings["RATE_LIMIT"], settings.get("RATE_BURST", 10), self.home_dir + "ratelimit.json", self.logger)
+        self.decode = decoder(settings.get("JSON_DECODER"), self.logger)        # parses straight from bytes
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        """ Open the shared connection pool and get a working access token,
+            using the stored token like ezyvet.initConnection().
+
+            Returns
+            -------
+            Bool
+                True when we have a token that works.
+        """
+        if aiohttp is None:
+            self.logger.error("AsyncEzyvet needs aiohttp, install it with: pip install aiohttp")
+            return False
+
+        workers = int(self.settings.get("PAGE_WORKERS", 4))
+        connections = int(self.settings.get("POOL_CONNECTIONS", 10))
+        maxsize = int(self.settings.get("POOL_MAXSIZE", max(10, workers)))
+        connector = aiohttp.TCPConnector(limit=connections * maxsize, limit_per_host=maxsize)
+        self.s = aiohttp.ClientSession(connector=connector)
+        self.token_lock = asyncio.Lock()
+
+        self.logger.info("Reading stored access token.")
+        self.token = self.tokens.load()
+        if self.token is None:
+            self.logger.info("No stored token, fetching new one.")
+            self.token = await self.fetchToken()
+        elif self.tokens.isFresh(self.token):
+            self.logger.info("Stored token is fresh, skipping test.")
+        elif self.tokens.expiresAt(self.token) is not None:
+            self.logger.info("Stored token has expired or is about to, refreshing token.")
+            self.token = await self.fetchToken()
+        else:
+            self.logger.info("Testing token.")
+            if await self.testToken() != 200:
+                self.logger.info("Test Failed, refreshing token.")
+                self.token = await self.fetchToken()
+                if await self.testToken() != 200:
+                    self.logger.error("Refreshing token did not work.")
+                    return False
+
+        if self.token is None:
+            self.logger.error("Could not get an access token.")
+            return False
+
+        self.logger.info("Init Complete.")
+        return True
+
+    async def close(self):
+        """ Close the shared connection pool. """
+        if self.s is not None:
+            await self.s.close()
+            self.s = None
+
+    async def testToken(self):
+        """ Test the token stored in self.token
+
+            Returns
+            -------
+            int or None
+                Returns a status code
+        """
+        if self.token is None or 'access_token' not in self.token:
+            self.logger.info("Token sent for testing was missing")
+            return None
+        try:
+            async with self.s.get(self.url + "/address?id=1", headers=self.headers()) as r:
+                response = json.loads(await r.read())
+                if "messages" in response and len(response["messages"]) > 0:
+                    if "level" in response["messages"][0] and response["messages"][0]["level"] == "error":
+                        self.logger.error("Received an error testing token: " + pformat(response))
+                        return None
+                return r.status
+        except Exception:
+            self.logger.error("Token did not work something went wrong.", exc_info=True)
+
+    async def fetchToken(self):
+        """ Get a fresh access token from the API. If sucessful write it to the
+            same token file the ezyvet class uses.
+
+            Returns
+            -------
+            dictonary or None
+                The token response from the API
+        """
+        try:
+            payload = {
+                "partner_id": self.partner_id,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+                "scope": self.scope
+            }
+            headers = {'cache-control': "no-cache"}
+            async with self.s.post(self.url + "/oauth/access_token", data=payload, headers=headers) as r:
+                response = json.loads(await r.read())
+            if "access_token" not in response:
+                self.logger.error("We got a message not an access token")
+                self.logger.error(pformat(response))
+                writeJson(response, self.home_dir + "err.json")
+                return None
+
+            return self.tokens.save(response)
+        except Exception:
+            self.logger.error("fetchToken Failed", exc_info=True)
+
+    async def refreshToken(self, stale=None):
+        """ Replace the access token unless another task already replaced
+            `stale`, see ezyvet.refreshToken().
+        """
+        async with self.token_lock:
+            if stale is None or self.token is None or self.token.get("access_token") == stale:
+                self.logger.info("Refreshing access token.")
+                token = await self.fetchToken()
+                if token is not None:
+                    self.token = token
+            return self.token
+
+    async def ensureToken(self):
+        """ Refresh the token shortly before it expires. """
+        token = self.token
+        if self.tokens.expiresAt(token) is not None and not self.tokens.isFresh(token):
+            self.logger.info("Access token is about to expire.")
+            await self.refreshToken(stale=token["access_token"])
+
+    async def throttle(self):
+        """ Wait for the rate limiter (see the RATE_LIMIT setting), if any.
+            The limiter locks its state file, so it is called from a worker
+            thread to keep the event loop free.
+        """
+        if self.limiter is None:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            wait = await loop.run_in_executor(None, self.limiter.take)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def pause(self, seconds):
+        """ Hold back everyone sharing the rate limiter, see RateLimiter.pause(). """
+        await asyncio.get_running_loop().run_in_executor(None, self.limiter.pause, seconds)
+
+    def headers(self):
+        return {
+            "authorization": "Bearer " + self.token["access_token"],
+            'Cache-Control': "no-cache"
+        }
+
+    async def getPage(self, url, page):
+        """ Fetch a single page of an endpoint, retrying 429, 5xx and
+            connection failures with backoff like ezyvet.getPage().
+
+            Returns
+            -------
+            dictonary or None
+                The decoded page (with "meta" and "items") or None for failure.
+        """
+        query = url if isinstance(url, Query) else Query.fromUrl(url)
+        url = query.url(page)                                                  # built fresh for every page
+
+        if self.cache is not None:
+            import sqlite3                                                      # already loaded with the cache
+            try:
+                data = self.cache.get(url)
+            except sqlite3.Error:                                               # a broken cache costs a request, not the page
+                self.logger.warning("getPage - reading the cache failed, fetching page " + str(page) + ".", exc_info=True)
+                data = None
+            if data is not None:
+                return data
+
+        retries = int(self.settings.get("PAGE_RETRIES", 3))
+        for attempt in range(1, retries + 1):
+            wait = None
+            try:
+                token = self.token["access_token"]
+                await self.throttle()
+                r = await self.s.get(self.url + url, headers=self.headers())
+                if r.status == 401:
+                    r.release()
+                    self.logger.info("Access token was rejected, refreshing it and retrying.")
+                    await self.refreshToken(stale=token)
+                    await self.throttle()
+                    r = await self.s.get(self.url + url, headers=self.headers())
+                async with r:
+                    self.logger.info("Got status code " + str(r.status) + " from request for page " + str(page) + ".")
+                    if r.status == 404:
+                        msg = """
+                                Received 404 not found. It is likely this request
+                                is not available in your version of the ezyVet API.
+                                Please refer to the README for more information.
+                            """
+                        self.logger.info(textwrap.dedent(msg))
+                        return None
+                    body = await r.read()
+                    if r.status == 429 or r.status >= 500:
+                        wait = retryAfter(r.headers.get("Retry-After"))
+                        self.logger.error("getPage - Unable to retreive page " + str(page) + ", received " + str(r.status) + " " + str(body))
+                        if r.status == 429 and self.limiter is not None:
+                            await self.pause(wait if wait is not None else backoffDelay(attempt))
+                    elif r.status != 200:
+                        self.logger.error("getPage - Unable to retreive page " + str(page) + ", received " + str(body))
+                        return None
+                    else:
+                        data = self.decode(body)
+                        if "meta" not in data or "items" not in data:
+                            self.logger.error("getPage - meta or items not in data.")
+                            return None
+                        if self.cache is not None:
+                            try:
+                                self.cache.put(url, data)
+                            except sqlite3.Error:
+                                self.logger.warning("getPage - caching page " + str(page) + " failed.", exc_info=True)
+                        return data
+            except (aiohttp.ClientError, asyncio.TimeoutError):                  # the session timeout raises TimeoutError
+                self.logger.error("getPage - request for page " + str(page) + " failed.", exc_info=True)
+
+            if attempt < retries:
+                delay = backoffDelay(attempt, wait, cap=float(self.settings.get("MAX_BACKOFF", 60)))
+                self.logger.info("Retrying page " + str(page) + " in " + str(round(delay, 2)) + " seconds (attempt " + str(attempt + 1) + " of " + str(retries) + ").")
+                await asyncio.sleep(delay)
+
+        self.logger.error("getPage - giving up on page " + str(page) + " after " + str(retries) + " attempts.")
+        return None
+
+    async def iterPages(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
+        """ Async generator of the "items" of each page, in page order. After
+            the first page the next `workers` pages are always in flight.
+            None is yielded (and the generator stops) when a page fails. With
+            fields, only those fields of each record are kept; with
+            maxrecords, that many records are returned instead of maxpages
+            pages, see ezyvet.iterPages().
+        """
+        if maxrecords is not None:
+            maxpages = None
+        path = url
+        url = Query(url, filter, pageSize(self.settings.get("PAGE_SIZE", MAX_LIMIT), maxrecords))
+        await self.ensureToken()
+
+        data = await self.getPage(url, 1)
+        if data is None:
+            yield None
+            return
+        pages = int(data["meta"]["items_page_total"])
+        remaining = None
+        if maxrecords is not None:
+            pages = min(pages, -(-maxrecords // max(1, len(data["items"]))))
+            remaining = maxrecords - len(data["items"])
+        yield self.project(path, data["items"][:maxrecords] if maxrecords is not None else data["items"], fields)
+
+        if maxpages is not None:
+            pages = min(pages, maxpages)
+        if pages <= 1:
+            return
+
+        if workers is None:
+            workers = self.settings.get("PAGE_WORKERS", 4)
+        workers = max(1, min(int(workers), pages - 1))
+
+        pending = []
+        page = 2                                                                # next page to request
+        try:
+            while page <= pages and len(pending) < workers:
+                pending.append(asyncio.ensure_future(self.getPage(url, page)))
+                page += 1
+            done = 1
+            while pending:
+                data = await pending.pop(0)
+                if data is None:
+                    self.logger.error("iterPages - page " + str(done + 1) + " failed, stopping after the " + str(done) + " pages fetched before it.")
+                    yield None
+                    return
+                if page <= pages:
+                    pending.append(asyncio.ensure_future(self.getPage(url, page)))
+                    page += 1
+                done += 1
+                items = data["items"]
+                if remaining is not None:
+                    items = items[:max(0, remaining)]
+                    remaining -= len(items)
+                yield self.project(path, items, fields)
+        finally:
+            for task in pending:                                                # the caller stopped early
+                task.cancel()
+
+    def project(self, url, items, fields):
+        """ Drop all but the given fields from each record, see localstore.project(). """
+        if not fields:
+            return items
+        name = url.strip("/")
+        return [project(name, item, fields) for item in items]
+
+    async def getData(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
+        """ Get all of the records from an endpoint, see ezyvet.getData().
+
+            Returns
+            -------
+            array or None
+                The "items" data  in an array of dictionaries, or None if any
+                page could not be fetched after its retries.
+        """
+        try:
+            items = []
+            async for page in self.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, fields=fields, maxrecords=maxrecords):
+                if page is None:                                                # a short list would look complete
+                    self.logger.error("getData - a page of " + str(url) + " could not be fetched, returning None. Use the exporter to keep partial results.")
+                    return None
+                items.extend(page)
+            self.logger.info("Returned " + str(len(items)) + " records.")
+            return items
+        except Exception:
+            self.logger.error("getData - something went wrong.", exc_info=True)
+
+    async def iterData(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
+        """ Async generator of the records from an endpoint, one at a time as
+            pages arrive, see ezyvet.iterData(). Raises IOError if a page
+            could not be fetched.
+        """
+        try:
+            async for page in self.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, fields=fields, maxrecords=maxrecords):
+                if page is None:
+                    raise IOError("iterData - a page of " + str(url) + " could not be fetched, the records stop short.")
+                for item in page:
+                    yield item
+        except IOError as err:
+            self.logger.error(str(err))
+            raise
+        except Exception:
+            self.logger.error("iterData - something went wrong.", exc_info=True)
+            raise
+
+
+def addEndpoint(name, path, kind, maxpages):
+    """ Add the getX coroutine and iterX async generator for one endpoint
+        to AsyncEzyvet, with the same arguments as the ezyvet methods.
+    """
+    if kind == "filter":
+        def arguments(filter=None, maxpages=1, fields=None, maxrecords=None):
+            return {"filter": filter, "maxpages": maxpages, "fields": fields, "maxrecords": maxrecords}
+    elif kind == "max":
+        def arguments(maxpages=1):
+            return {"maxpages": maxpages}
+    else:
+        def arguments(maxpages=maxpages):
+            return {"maxpages": maxpages}
+
+    async def get(self, *args, **kwargs):
+        return await self.getData(path, **arguments(*args, **kwargs))
+
+    def iter(self, *args, **kwargs):
+        return self.iterData(path, **arguments(*args, **kwargs))
+
+    get.__name__ = get.__qualname__ = "get" + name
+    get.__doc__ = "Coroutine version of ezyvet.get" + name + "(), see " + path + " in the API docs."
+    iter.__name__ = iter.__qualname__ = "iter" + name
+    iter.__doc__ = "Async generator version of ezyvet.iter" + name + "(), see " + path + " in the API docs."
+    setattr(AsyncEzyvet, "get" + name, get)
+    setattr(AsyncEzyvet, "iter" + name, iter)
+
+for name, (path, kind, maxpages) in ENDPOINTS.items():
+    addEndpoint(name, path, kind, maxpages)
@@ -0,0 +1,147 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+# How long pages of each endpoint stay cached, in seconds. Reference data
+# hardly ever changes, appointments change all day. Endpoints not listed use
+# the CACHE_EXPIRE setting. Override or add entries with CACHE_TTLS.
+DEFAULT_TTLS = {
+    "/appointment": 30,
+    "/appointmentstatus": 7 * DAY,
+    "/appointmenttype": 7 * DAY,
+    "/animalcolor": 7 * DAY,
+    "/breed": 7 * DAY,
+    "/contactdetailtype": 7 * DAY,
+    "/country": 7 * DAY,
+    "/paymentmethods": 7 * DAY,
+    "/sex": 7 * DAY,
+    "/species": 7 * DAY,
+    "/tagcategory": 7 * DAY,
+    "/systemsetting": DAY,
+}
+
+class ResponseCache:
+    """
+    Cache of decoded API pages owned by one client. Unlike the old
+    requests_cache.install_cache() it doesn't patch requests, so nothing else
+    in the process is affected. Pages are keyed by API URL, endpoint and
+    querystring (not the access token, so refreshing the token keeps the
+    cache, but sandbox and production pages sharing a file stay apart),
+    expire after their endpoint's TTL and the least recently used pages are
+    dropped once there are more than `maxentries`.
+
+    Attributes
+    ----------
+    filename : string
+        SQLite file the cache is kept in, ":memory:" for this process only
+    expire : int
+        TTL in seconds of endpoints without their own entry in `ttls`
+    ttls : dictonary, optional
+        Endpoint to TTL in seconds, added to DEFAULT_TTLS
+    maxentries : int, optional
+        Most pages kept
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    base : string, optional
+        The API URL of the client (PROD_URL or SAND_URL), put in front of
+        every key
+    """
+
+    def __init__(self, filename, expire=300, ttls=None, maxentries=10000, logger=None, base=""):
+        self.logger = logger or logging.getLogger(__name__)
+        self.base = base
+        self.expire = expire
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.maxentries = maxentries
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        with self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    used_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS pages_endpoint ON pages (endpoint)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+
+    def ttl(self, endpoint):
+        return self.ttls.get(endpoint, self.expire)
+
+    def get(self, url):
+        """ Return the cached page for a url (endpoint plus querystring) or
+            None if it isn't cached or has expired.
+        """
+        endpoint = endpointOf(url)
+        key = self.base + url
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT stored_at, data FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] + self.ttl(endpoint) < now:
+                with self.db:
+                    self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                return None
+            with self.db:
+                self.db.execute("UPDATE pages SET used_at = ? WHERE key = ?", (now, key))
+        self.logger.debug("Cache hit: " + url)
+        return json.loads(row[1])
+
+    def put(self, url, data):
+        """ Cache a decoded page, dropping the least recently used pages if
+            the cache is full.
+        """
+        endpoint = endpointOf(url)
+        if self.ttl(endpoint) <= 0:
+            return
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO pages (key, endpoint, stored_at, used_at, data) VALUES (?, ?, ?, ?, ?)",
+                            (self.base + url, endpoint, now, now, json.dumps(data)))
+            count = self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            if count > self.maxentries:
+                self.db.execute("DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY used_at LIMIT ?)",
+                                (count - self.maxentries,))
+
+    def invalidate(self, endpoint=None):
+        """ Drop this API URL's cached pages of an endpoint (e.g.
+            "/appointment"), or of every endpoint if none is given.
+        """
+        mine = "substr(key, 1, ?) = ?"
+        with self.lock, self.db:
+            if endpoint is None:
+                self.db.execute("DELETE FROM pages WHERE " + mine, (len(self.base), self.base))
+            else:
+                self.db.execute("DELETE FROM pages WHERE endpoint = ? AND " + mine, (endpoint, len(self.base), self.base))
+
+
+def endpointOf(url):
+    """ "/animal?name=foo&page=2" -> "/animal" """
+    return url.split("?", 1)[0]
@@ -0,0 +1,259 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import json
+import logging
+import os
+import re
+try:
+    import pyarrow                      # optional, only needed for columnar exports
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+try:
+    from ezyvet.localstore import unwrap
+except ImportError:
+    from .localstore import unwrap
+
+INT = re.compile(r"^-?(0|[1-9][0-9]*)$")           # no leading zeros, "007" stays text
+FLOAT = re.compile(r"^-?(0|[1-9][0-9]*)(\.[0-9]+)?$")
+
+class ColumnarExport:
+    """
+    Stream an endpoint into typed columns. Each record's envelope
+    ({"invoice": {...}}) is taken off, nested objects become "parent.child"
+    columns and lists are kept as JSON text. Pages are buffered into batches
+    of `rows` records, so memory is bounded by the batch size, not by the
+    export. The column types come from the first batch (the API sends most
+    numbers as strings): whole numbers become int64 (timestamp for *_at
+    fields), decimals float64 and everything else string. The file's schema
+    can't change once the first batch is written, so a later value that
+    doesn't fit its column, or a column the first batch didn't have, fails
+    the export rather than being written as null. Pass a schema (or a larger
+    `rows`) for endpoints like that.
+
+        x = ColumnarExport(e)
+        x.parquet("/invoiceline", "lines.parquet", {"invoice_id": 50003}, maxpages=None)
+        for batch in x.batches("/invoice", maxpages=100):
+            ...
+
+    Needs pyarrow: pip install pyarrow
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance used to fetch the pages
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    rows : int
+        Records per record batch or Parquet row group
+    """
+
+    def __init__(self, e, logger=None, rows=10000):
+        self.e = e
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+        self.rows = rows
+
+    def schema(self, rows):
+        """ Pick a type for every column seen in rows, see columnType(). """
+        names = []
+        seen = set()
+        for row in rows:
+            for name in row:
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+        return pyarrow.schema([(name, columnType(name, [row.get(name) for row in rows])) for name in names])
+
+    def batch(self, rows, schema):
+        """ Build a record batch from flattened rows.
+
+            Raises
+            ------
+            ValueError
+                When a value doesn't fit its column's type or a row has a
+                column the schema doesn't, nothing is dropped quietly.
+        """
+        extra = set(name for row in rows for name in row) - set(schema.names)
+        if extra:
+            raise ValueError("Columns not in the schema: " + ", ".join(sorted(extra)) +
+                             ". Pass a schema with them, or a larger rows so the first batch sees them.")
+        columns = []
+        for field in schema:
+            values = []
+            for row in rows:
+                try:
+                    values.append(convert(row.get(field.name), field.type))
+                except (TypeError, ValueError):
+                    raise ValueError(repr(row.get(field.name)) + " in " + field.name + " is not " + str(field.type) +
+                                     ". Pass a schema with a wider type for it, or a larger rows so the first batch sees it.") from None
+            columns.append(pyarrow.array(values, type=field.type))
+        return pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+    def batches(self, url, filter=None, maxpages=None, workers=None, schema=None, maxrecords=None):
+        """ Generator that fetches an endpoint page by page and yields record
+            batches of up to `rows` records.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            maxpages : int
+                The maximum number of pages to fetch, None for all of them.
+            workers : int, optional
+                Pages fetched at the same time, see ezyvet.getData().
+            schema : pyarrow.Schema, optional
+                Column names and types to use instead of guessing them from
+                the first batch.
+            maxrecords : int, optional
+                The maximum number of records to fetch, instead of maxpages.
+
+            Yields
+            ------
+            pyarrow.RecordBatch
+                The next `rows` records as typed columns.
+
+            Raises
+            ------
+            IOError
+                When a page could not be fetched.
+            ValueError
+                When a record doesn't fit the schema, see batch().
+        """
+        if pyarrow is None:
+            raise ImportError("Columnar exports need pyarrow, install it with: pip install pyarrow")
+        name = url.strip("/")
+        rows = []
+        for items in self.e.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, maxrecords=maxrecords):
+            if items is None:
+                raise IOError("A page of " + url + " could not be fetched.")
+            for item in items:
+                rows.append(flatten(unwrap(name, item)))
+            if len(rows) >= self.rows:
+                if schema is None:
+                    schema = self.schema(rows)
+                yield self.batch(rows, schema)
+                rows = []
+        if rows or schema is None:
+            if schema is None:
+                schema = self.schema(rows)
+            yield self.batch(rows, schema)
+
+    def parquet(self, url, filename, filter=None, maxpages=None, workers=None, schema=None, compression="snappy", maxrecords=None):
+        """ Export an endpoint to a Parquet file, one row group per batch.
+            The file is only put in place once every page has been written.
+            See batches() for the parameters.
+
+            Returns
+            -------
+            Bool
+                True when the file was written.
+        """
+        return self.write(url, filename, filter, maxpages, workers, schema, maxrecords,
+                          lambda sink, schema: pyarrow.parquet.ParquetWriter(sink, schema, compression=compression))
+
+    def arrow(self, url, filename, filter=None, maxpages=None, workers=None, schema=None, maxrecords=None):
+        """ Export an endpoint to an Arrow IPC (Feather v2) file, one record
+            batch at a time. See batches() for the parameters.
+
+            Returns
+            -------
+            Bool
+                True when the file was written.
+        """
+        return self.write(url, filename, filter, maxpages, workers, schema, maxrecords, pyarrow.ipc.new_file if pyarrow else None)
+
+    def write(self, url, filename, filter, maxpages, workers, schema, maxrecords, open):
+        """ Write each batch with a writer from open(filename, schema). """
+        tmp = filename + ".tmp"
+        writer = None
+        try:
+            count = 0
+            for batch in self.batches(url, filter=filter, maxpages=maxpages, workers=workers, schema=schema, maxrecords=maxrecords):
+                if writer is None:
+                    writer = open(tmp, batch.schema)
+                writer.write_table(pyarrow.Table.from_batches([batch]))        # one row group per batch
+                count += batch.num_rows
+            if writer is None:                                              # no records
+                if schema is None:
+                    self.logger.info("No records of " + url + ", " + filename + " was not written.")
+                    return True
+                writer = open(tmp, schema)                                  # an empty file with the columns asked for
+            writer.close()
+            writer = None
+            os.replace(tmp, filename)
+            self.logger.info("Wrote " + str(count) + " records of " + url + " to " + filename)
+            return True
+        except Exception:
+            self.logger.error("Columnar export of " + url + " failed.", exc_info=True)
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+
+def flatten(fields, prefix="", out=None):
+    """ Nested objects become "parent.child" columns, lists are kept as JSON text. """
+    if out is None:
+        out = {}
+    for key, value in fields.items():
+        if isinstance(value, dict):
+            flatten(value, prefix + key + ".", out)
+        elif isinstance(value, list):
+            out[prefix + key] = json.dumps(value)
+        else:
+            out[prefix + key] = value
+    return out
+
+def columnType(name, values):
+    """ The Arrow type for a column, from its name and values. """
+    seen = [v for v in values if v is not None and v != ""]
+    if not seen:
+        return pyarrow.string()
+    if all(isinstance(v, bool) for v in seen):
+        return pyarrow.bool_()
+    if all(not isinstance(v, bool) and (isinstance(v, int) or (isinstance(v, str) and INT.match(v))) for v in seen):
+        return pyarrow.timestamp("s") if name.endswith("_at") else pyarrow.int64()
+    if all(not isinstance(v, bool) and (isinstance(v, (int, float)) or (isinstance(v, str) and FLOAT.match(v))) for v in seen):
+        return pyarrow.float64()
+    return pyarrow.string()
+
+def convert(value, type):
+    """ A value as the Python type Arrow expects for the column type. """
+    if value is None or value == "":
+        return None
+    if pyarrow.types.is_boolean(type):
+        if not isinstance(value, bool):
+            raise ValueError(value)
+        return value
+    if pyarrow.types.is_integer(type) or pyarrow.types.is_timestamp(type):
+        if isinstance(value, bool):
+            raise ValueError(value)
+        if isinstance(value, int) or (isinstance(value, str) and INT.match(value)):
+            return int(value)
+        if isinstance(value, float) and value.is_integer():             # 3.0 but not 2.5
+            return int(value)
+        raise ValueError(value)
+    if pyarrow.types.is_floating(type):
+        if isinstance(value, bool):
+            raise ValueError(value)
+        return float(value)
+    return value if isinstance(value, str) else json.dumps(value)
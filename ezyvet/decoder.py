@@ -0,0 +1,63 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" JSON decoders for API responses. Every backend parses the response body
+    straight from bytes, so a page is never turned into a str first. orjson
+    and ujson are optional and only imported when they are asked for; the
+    JSON_DECODER setting picks one by name and "auto" (the default) uses the
+    fastest one installed.
+"""
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import importlib
+import json
+
+OPTIONAL = ("orjson", "ujson")          # imported the first time they are asked for
+BACKENDS = {"json": json.loads}         # name -> loads of the backends tried so far, None if not installed
+
+PREFERENCE = ("orjson", "ujson", "json")
+
+def load(name):
+    """ The loads function of a backend, importing it the first time it is
+        asked for. None if it isn't installed or isn't a backend. """
+    if name not in BACKENDS and name in OPTIONAL:
+        try:
+            BACKENDS[name] = importlib.import_module(name).loads
+        except ImportError:
+            BACKENDS[name] = None
+    return BACKENDS.get(name)
+
+def installed():
+    """ name -> loads for every backend installed, importing them all. """
+    return {name: loads for name, loads in ((n, load(n)) for n in PREFERENCE) if loads is not None}
+
+def decoder(name=None, logger=None):
+    """ The loads function for a backend name, or the fastest one installed
+        for None or "auto". Unknown or missing backends fall back to json. """
+    if name in (None, "auto"):
+        return next(loads for loads in map(load, PREFERENCE) if loads is not None)
+    loads = load(name)
+    if loads is None:
+        if logger is not None:
+            logger.error("JSON decoder " + str(name) + " is not installed, using json.")
+        return json.loads
+    return loads
+
+def backendName(loads):
+    """ The name of the backend a loads function belongs to. """
+    return next(n for n, f in BACKENDS.items() if f is loads)
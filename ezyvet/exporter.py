@@ -0,0 +1,333 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+try:
+    from ezyvet.ezhelpers import readJson, replaceJson
+    from ezyvet.query import Query, pageSize, MAX_LIMIT
+except ImportError:
+    from .ezhelpers import readJson, replaceJson
+    from .query import Query, pageSize, MAX_LIMIT
+
+class Exporter:
+    """
+    Resumable bulk export. Each page is written to disk as soon as it
+    arrives and a checkpoint (resource, filter, last page, total pages) is
+    kept next to the pages under HOME_DIR/exports. If the run dies, running
+    it again with the same arguments carries on after the last saved page
+    instead of starting over.
+
+        x = Exporter(e)
+        if x.run("/history", {"animal_id": 1234}, maxpages=3000, resume=True):
+            for record in x.records():
+                ...
+            x.clear()
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance used to fetch the pages
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, e, logger=None):
+        self.e = e
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+        self.base_dir = os.path.join(e.home_dir, "exports")
+        self.dir = None
+
+    def limit(self, maxrecords=None):
+        """ Records per page the export asks for, see the PAGE_SIZE setting. """
+        return pageSize(self.e.settings.get("PAGE_SIZE", MAX_LIMIT), maxrecords)
+
+    def key(self, url, filter, maxpages, maxrecords=None):
+        """ A stable name for an export, the same arguments give the same key.
+            The API URL and page size are part of it, saved pages can't be
+            continued from another API (sandbox or production) or with pages
+            of another size.
+        """
+        query = Query(url, filter, self.limit(maxrecords)).key()
+        args = json.dumps({"api": self.e.url, "query": query, "maxpages": maxpages, "maxrecords": maxrecords})
+        return hashlib.sha1(args.encode("utf-8")).hexdigest()
+
+    def open(self, url, filter=None, maxpages=None, maxrecords=None):
+        """ Point the exporter at the export directory for these arguments
+            and return its checkpoint (or None if there isn't one).
+        """
+        self.dir = os.path.join(self.base_dir, self.key(url, filter, maxpages, maxrecords))
+        return readJson(self.checkpointFile()) if os.path.exists(self.checkpointFile()) else None
+
+    def checkpointFile(self):
+        return os.path.join(self.dir, "checkpoint.json")
+
+    def pageFile(self, page):
+        return os.path.join(self.dir, "page-" + str(page).zfill(6) + ".json")
+
+    def run(self, url, filter=None, maxpages=None, resume=True, workers=None, maxrecords=None):
+        """ Fetch every page, saving each one and the checkpoint as we go.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            maxpages : int
+                The maximum number of pages to export, None for all of them.
+            resume : Bool, optional
+                Carry on from an earlier run with the same arguments. If False
+                any earlier export with these arguments is thrown away.
+            workers : int, optional
+                Pages fetched at the same time, see ezyvet.getData().
+            maxrecords : int, optional
+                The maximum number of records to export, used instead of
+                maxpages.
+
+            Returns
+            -------
+            Bool
+                True when every page has been saved.
+        """
+        try:
+            checkpoint = self.open(url, filter, maxpages, maxrecords)
+            if checkpoint is not None and not resume:
+                self.logger.info("Discarding earlier export in " + self.dir)
+                self.clear()
+                checkpoint = None
+            if checkpoint is not None and checkpoint.get("complete"):
+                self.logger.info("Export in " + self.dir + " is already complete.")
+                return True
+
+            start = 1
+            if checkpoint is None:
+                os.makedirs(self.dir, exist_ok=True)
+                checkpoint = {
+                    "resource": url,
+                    "filter": filter,
+                    "maxpages": maxpages,
+                    "maxrecords": maxrecords,
+                    "limit": self.limit(maxrecords),
+                    "last_page": 0,
+                    "records": 0,
+                    "pages": None,
+                    "complete": False
+                }
+                replaceJson(checkpoint, self.checkpointFile())
+            elif checkpoint.get("limit") != self.limit(maxrecords):
+                self.logger.error("Export in " + self.dir + " was saved with " + str(checkpoint.get("limit")) + " records per page, not " + str(self.limit(maxrecords)) + ". Run it with resume off to start again.")
+                return False
+            else:
+                start = checkpoint["last_page"] + 1
+                self.logger.info("Resuming export of " + url + " from page " + str(start) + " of " + str(checkpoint["pages"]) + ".")
+
+            if checkpoint["pages"] is not None and start > checkpoint["pages"]:
+                checkpoint["complete"] = True
+                replaceJson(checkpoint, self.checkpointFile())
+                return True
+
+            remaining = None
+            if maxrecords is not None:
+                remaining = maxrecords - checkpoint["records"]                 # the saved pages count towards it
+            for page, pages, items in self.e.iterNumberedPages(url, filter=filter, maxpages=maxpages, workers=workers, start=start,
+                                                               maxrecords=remaining, limit=checkpoint["limit"]):
+                if items is None:
+                    self.logger.error("Export of " + url + " stopped at page " + str(page) + ", run it again to resume.")
+                    return False
+                replaceJson(items, self.pageFile(page))
+                checkpoint["last_page"] = page
+                checkpoint["pages"] = pages
+                checkpoint["records"] += len(items)
+                replaceJson(checkpoint, self.checkpointFile())
+
+            checkpoint["complete"] = True
+            replaceJson(checkpoint, self.checkpointFile())
+            self.logger.info("Exported " + str(checkpoint["last_page"]) + " pages of " + url + " to " + self.dir)
+            return True
+
+        except Exception:
+            self.logger.error("Export failed, run it again to resume.", exc_info=True)
+            return False
+
+    def records(self):
+        """ Yield the saved records in page order, one page in memory at a time. """
+        checkpoint = readJson(self.checkpointFile())
+        for page in range(1, checkpoint["last_page"] + 1):
+            for item in readJson(self.pageFile(page)):
+                yield item
+
+    def clear(self):
+        """ Remove the saved pages and checkpoint. """
+        if self.dir is not None and os.path.isdir(self.dir):
+            shutil.rmtree(self.dir)
+
+
+class ParallelExporter:
+    """
+    Bulk export spread over several processes. The query is split into
+    disjoint ranges of one field (id or created_at) and each range is
+    exported by a worker process with its own ezyvet session, using the
+    resumable Exporter above. The workers share the RATE_LIMIT budget through
+    HOME_DIR/ratelimit.json and the token on file. When every range is done
+    the records are merged, in range order, into one ndjson file.
+
+        x = ParallelExporter(e, processes=4)
+        x.run("/history", {"animal_id": 1234}, "created_at", 1514764800, 1609459200, "history.ndjson")
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance, its settings are handed to the workers
+    processes : int
+        Worker processes, defaults to the number of CPUs
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, e, processes=None, logger=None):
+        self.e = e
+        self.processes = processes or os.cpu_count() or 1
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+
+    def partitions(self, filter, field, start, stop, parts):
+        """ Split the filter into one filter per range of field.
+            Parameters
+            ----------
+            filter : dictonary
+                The filter every range shares
+            field : string
+                The field to split on, e.g. "id" or "created_at"
+            start : int
+                The first value to export
+            stop : int
+                Export values below this one
+            parts : int
+                How many ranges to make
+
+            Returns
+            -------
+            array
+                One filter per range, in range order.
+        """
+        filters = []
+        for lo, hi in splitRange(start, stop, parts):
+            f = dict(filter or {})
+            f[field] = {"gte": lo, "lt": hi}
+            filters.append(f)
+        return filters
+
+    def run(self, url, filter, field, start, stop, output, parts=None, resume=True, workers=None):
+        """ Export every range in the process pool, then merge them.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            field : string
+                The field to split on, "id" or a date field like "created_at"
+            start : int
+                The first value to export (an id or a unix time)
+            stop : int
+                Export values below this one
+            output : string
+                The ndjson file to write, replaced only when every range is done
+            parts : int, optional
+                How many ranges to make. Defaults to four per process so a busy
+                range doesn't leave the other processes idle.
+            resume : Bool, optional
+                Keep finished ranges from an earlier run with the same arguments.
+            workers : int, optional
+                Pages fetched at the same time inside each process.
+
+            Returns
+            -------
+            Bool
+                True when every range was exported and merged.
+        """
+        try:
+            if filter and field in filter:
+                self.logger.error("The filter already has " + field + ", can't split on it.")
+                return False
+            filters = self.partitions(filter, field, start, stop, parts or self.processes * 4)
+            sandbox = self.e.url == self.e.settings.get("SAND_URL")
+            self.logger.info("Exporting " + url + " in " + str(len(filters)) + " ranges of " + field + " with " + str(self.processes) + " processes.")
+
+            from concurrent.futures import ProcessPoolExecutor                 # pulls in multiprocessing, only needed here
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                futures = [pool.submit(exportPartition, self.e.settings, sandbox, url, f, resume, workers) for f in filters]
+                ok = True
+                for f, future in zip(filters, futures):
+                    try:
+                        if not future.result():
+                            ok = False
+                    except Exception:
+                        self.logger.error("Export of " + url + " " + field + " " + str(f[field]) + " failed.", exc_info=True)
+                        ok = False
+            if not ok:
+                self.logger.error("Some ranges of " + url + " did not finish, run it again to resume.")
+                return False
+
+            count = 0
+            tmp = output + ".tmp"
+            with open(tmp, "w") as outfile:
+                for f in filters:                                               # ranges in order, each in page order
+                    x = Exporter(self.e, self.logger)
+                    x.open(url, f, None)
+                    for record in x.records():
+                        outfile.write(json.dumps(record) + "\n")
+                        count += 1
+            os.replace(tmp, output)
+            for f in filters:
+                x = Exporter(self.e, self.logger)
+                x.open(url, f, None)
+                x.clear()
+            self.logger.info("Wrote " + str(count) + " records of " + url + " to " + output)
+            return True
+
+        except Exception:
+            self.logger.error("Parallel export failed, run it again to resume.", exc_info=True)
+            return False
+
+def splitRange(start, stop, parts):
+    """ Split [start, stop) into up to `parts` disjoint (lo, hi) ranges of
+        about the same width, in order. """
+    start, stop = int(start), int(stop)
+    parts = max(1, min(int(parts), stop - start))
+    width, extra = divmod(stop - start, parts)
+    ranges = []
+    lo = start
+    for i in range(parts):
+        hi = lo + width + (1 if i < extra else 0)
+        ranges.append((lo, hi))
+        lo = hi
+    return ranges
+
+def exportPartition(settings, sandbox, url, filter, resume, workers):
+    """ Process pool worker, export one range with a session of its own. """
+    try:
+        from ezyvet.ezyvet import ezyvet
+    except ImportError:
+        from .ezyvet import ezyvet
+    logger = logging.getLogger(__name__)
+    e = ezyvet(settings, logger, sandbox=sandbox)
+    return Exporter(e, logger).run(url, filter=filter, maxpages=None, resume=resume, workers=workers)
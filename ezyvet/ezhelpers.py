@@ -52,3 +52,11 @@ def readJson(filename):
         logger.error("There is no token on file.")
     except:
         logger.error("Read JSON Failed", exc_info=True)
+
+def replaceJson(data, filename):
+    """ Write json to a temporary file then move it over filename, so readers
+        (or a later run after a crash) never see a half written file."""
+    tmp = filename + ".tmp"
+    with open(tmp, 'w') as outfile:
+        json.dump(data, outfile)
+    os.replace(tmp, filename)
@@ -18,7 +18,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import requests
-import requests_cache
+from requests.adapters import HTTPAdapter
 import json
 from pprint import pprint,pformat
 import re
@@ -26,11 +26,48 @@ import logging
 import sys
 import os
 import textwrap
+import threading
+from collections import deque
+import time
 from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
 try:
-    from ezyvet.ezhelpers import writeJson, readJson
+    from ezyvet.ezhelpers import writeJson
+    from ezyvet.tokenmanager import TokenManager
+    from ezyvet.ratelimiter import RateLimiter, backoffDelay, retryAfter
+    from ezyvet.decoder import decoder, backendName
+    from ezyvet.query import Query, encodeValue, pageSize, MAX_LIMIT
+    from ezyvet.registry import ReferenceRegistry
+    from ezyvet.resources import RELATIONSHIPS
+    from ezyvet.localstore import unwrap, project
 except ImportError:
-    from .ezhelpers import writeJson, readJson
+    from .ezhelpers import writeJson
+    from .tokenmanager import TokenManager
+    from .ratelimiter import RateLimiter, backoffDelay, retryAfter
+    from .decoder import decoder, backendName
+    from .query import Query, encodeValue, pageSize, MAX_LIMIT
+    from .registry import ReferenceRegistry
+    from .resources import RELATIONSHIPS
+    from .localstore import unwrap, project
+
+def idChunks(ids, overhead, limit):
+    """ Split ids into lists whose {"id": {"in": [...]}} querystring keeps the
+        whole URL (overhead is the length of the rest of it) under limit.
+    """
+    chunks = []
+    chunk = []
+    length = overhead + len(urlencode({"id": encodeValue({"in": []})}))
+    for id in ids:
+        size = len(urlencode({"": json.dumps(id)})) + 2               # the id plus an encoded comma
+        if chunk and length + size > limit:
+            chunks.append(chunk)
+            chunk = []
+            length = overhead + len(urlencode({"id": encodeValue({"in": []})}))
+        chunk.append(id)
+        length += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
 
 class ezyvet:
     """
@@ -58,6 +95,13 @@ class ezyvet:
     fetchToken()
         Get a new token if we don't have one or if it is invalid
 
+    getData(url, filter, maxpages)
+        Get all of the records from an endpoint as a list.
+
+    iterData(url, filter, maxpages)
+        Yield the records from an endpoint one at a time as pages arrive.
+        Each getX() method has a matching iterX() method.
+
     TOTO: Finish Methods Doc
 
     """
@@ -77,14 +121,6 @@ class ezyvet:
             self.logger = logger or logging.getLogger(__name__)
             self.settings = settings
 
-            if 'USE_CACHE' in settings and settings["USE_CACHE"] is True:
-                if "CACHE_EXPIRE" in settings:
-                    sec = settings["CACHE_EXPIRE"]
-                else:
-                    sec = 300   # default to 300ms if not set
-                self.logger.info("Turning requests cache on, will expire in: " + str(sec) + " miliseconds.")
-                requests_cache.install_cache(settings["HOME_DIR"]+'api_cache', backend='sqlite', expire_after=sec)
-
             if sandbox is False:
                 self.url = settings["PROD_URL"]
                 self.partner_id = self.settings['PARTNER_ID'],
@@ -104,6 +140,42 @@ class ezyvet:
                 else:
                     self.home_dir = self.home_dir + '/'
             self.logger.info("Using working directory: " + self.home_dir)
+            self.tokens = TokenManager(self.home_dir, self.logger, int(self.settings.get("TOKEN_REFRESH_MARGIN", 300)))
+            self.token_lock = threading.Lock()
+            self.limiter = None
+            if self.settings.get("RATE_LIMIT"):                                 # shared by every process using this HOME_DIR
+                self.logger.info("Limiting requests to " + str(self.settings["RATE_LIMIT"]) + " per minute.")
+                self.limiter = RateLimiter(self.settings["RATE_LIMIT"], self.settings.get("RATE_BURST", 10), self.home_dir + "ratelimit.json", self.logger)
+            if self.settings.get("USE_CACHE") is True or self.settings.get("USE_MIRROR") is True:
+                os.makedirs(self.home_dir, exist_ok=True)
+
+            self.cache = None
+            if self.settings.get("USE_CACHE") is True:                          # cache owned by this client, requests is left alone
+                try:                                                            # sqlite3 is only loaded when it's used
+                    from ezyvet.cache import ResponseCache
+                except ImportError:
+                    from .cache import ResponseCache
+                sec = self.settings.get("CACHE_EXPIRE", 300)
+                self.logger.info("Turning response cache on, pages expire after " + str(sec) + " seconds unless CACHE_TTLS says otherwise.")
+                self.cache = ResponseCache(self.home_dir + "api_cache.sqlite3", sec, self.settings.get("CACHE_TTLS"),
+                                           int(self.settings.get("CACHE_MAX_ENTRIES", 10000)), self.logger, self.url)
+
+            self.decode = decoder(self.settings.get("JSON_DECODER"), self.logger)
+            self.logger.debug("Decoding JSON with " + backendName(self.decode))
+
+            self.registry = ReferenceRegistry(self, int(self.settings.get("REFERENCE_REFRESH", 3600)), self.logger)
+
+            self.mirror = None
+            if self.settings.get("USE_MIRROR") is True:                         # read through a local SQLite copy
+                try:
+                    from ezyvet.mirror import Mirror
+                    from ezyvet.localstore import LocalStore
+                except ImportError:
+                    from .mirror import Mirror
+                    from .localstore import LocalStore
+                filename = self.settings.get("MIRROR_FILE", self.home_dir + "mirror.sqlite3")
+                self.logger.info("Using local mirror " + filename)
+                self.mirror = Mirror(self, LocalStore(filename, self.logger), int(self.settings.get("MIRROR_MAX_AGE", 3600)), self.logger)
 
             if self.partner_id == '' or self.client_id == '' or self.client_secret == '' or self.scope == '':
                 self.logger.error("The settings file is incomplete. Make sure the partner id, client id, secret, and scope are filled in.")
@@ -116,28 +188,39 @@ class ezyvet:
     def initConnection(self):
         """
             Initializes the connection to ezyVet using a new or stored access token.
-            If the first test fails, the token has probabily gone bad, so we refresh
-            and retry. Two failures stops the program.
+            A stored token that is known to be fresh is used without testing it,
+            one that is about to expire is replaced. Tokens stored without an
+            issue time are tested; if the test fails, the token has probabily
+            gone bad, so we refresh and retry. Two failures stops the program.
         """
         try:
-            self.s = requests.session()
+            self.s = self.initSession()
             for attempt in range(1):                                            # number to make repeated attempts to init
                 try:
                     self.logger.info("Reading stored access token.")
-                    self.token = readJson(self.home_dir + "token.json")         # lets see if we have a stored token
+                    self.token = self.tokens.load()                             # lets see if we have a stored token
                     if self.token is None:
                         self.logger.info("No stored token, fetching new one.")
                         self.token = self.fetchToken()
-
-                    self.logger.info("Testing token.")
-                    test = self.testToken()
-                    if test is not 200 or test is None:                         # Lets test the Token
-                        self.logger.info("Test Failed, refreshing token.")
+                    elif self.tokens.isFresh(self.token):
+                        self.logger.info("Stored token is fresh, skipping test.")
+                    elif self.tokens.expiresAt(self.token) is not None:
+                        self.logger.info("Stored token has expired or is about to, refreshing token.")
                         self.token = self.fetchToken()
-                        self.logger.info("Re-testing token.")
-                        if self.testToken() is not 200:
-                            self.logger.error("Refreshing token did not work, quiting.")
-                            sys.exit(2)
+                    else:
+                        self.logger.info("Testing token.")
+                        test = self.testToken()
+                        if test != 200:                                         # Lets test the Token
+                            self.logger.info("Test Failed, refreshing token.")
+                            self.token = self.fetchToken()
+                            self.logger.info("Re-testing token.")
+                            if self.testToken() != 200:
+                                self.logger.error("Refreshing token did not work, quiting.")
+                                sys.exit(2)
+
+                    if self.token is None:
+                        self.logger.error("Could not get an access token, quiting.")
+                        sys.exit(2)
 
                     self.logger.info("Init Complete.")
 
@@ -150,6 +233,26 @@ class ezyvet:
         except:
             self.logger.error("Initconnection Failed", exc_info=True)
 
+    def initSession(self):
+        """ Build the pooled, keep-alive session all API calls go through, so
+            pages and token calls reuse connections instead of opening a new
+            TCP+TLS connection for every request.
+
+            Returns
+            -------
+            requests.Session
+                The session with the pool sizes from the settings mounted.
+        """
+        workers = int(self.settings.get("PAGE_WORKERS", 4))
+        connections = int(self.settings.get("POOL_CONNECTIONS", 10))        # number of hosts to keep pools for
+        maxsize = int(self.settings.get("POOL_MAXSIZE", max(10, workers)))  # connections kept open per host
+        self.logger.debug("Session pool: " + str(connections) + " hosts, " + str(maxsize) + " connections per host.")
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=maxsize)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        return s
+
     def testToken(self):
         """ Test the token stored in self.token
             Parameters
@@ -171,7 +274,8 @@ class ezyvet:
             }
             # Get some trivial data to test the token id=1 is the address of
             # ezyVet in Auckland
-            r = requests.request("GET", self.url + "/address?id=1", headers=headers)
+            self.throttle()
+            r = self.s.request("GET", self.url + "/address?id=1", headers=headers)
             self.logger.debug("Token testing response: " + str(r.content))
             response = r.json()
             if "messages" in response and len(response["messages"]) > 0:
@@ -214,7 +318,7 @@ class ezyvet:
             }
             url = self.url + "/oauth/access_token"
             self.logger.info("API URL: " + url)
-            r = requests.request("POST", url, data=payload, headers=headers)
+            r = self.s.request("POST", url, data=payload, headers=headers)
             self.logger.info(r.text)
             response = r.json()
             if "access_token" not in response:
@@ -224,10 +328,8 @@ class ezyvet:
                 self.logger.info("Wrote error to " + self.home_dir + "err.json")
                 sys.exit(2)
 
-            writeJson(response, self.home_dir + "token.json")
             self.logger.info("Got access token: " + response["access_token"])
-            self.logger.info("Wrote token to " + self.home_dir + "err.json")
-            return response
+            return self.tokens.save(response)
 
         except requests.exceptions.ConnectionError:
             self.logger.error("fetchToken - Connection error", exc_info=True)
@@ -236,7 +338,288 @@ class ezyvet:
         except:
             self.logger.error("fetchToken Failed", exc_info=True)
 
-    def getData(self, url, filter=None, maxpages=1):
+    def authHeaders(self):
+        """ Request headers carrying the current access token. """
+        return {
+            "authorization": "Bearer " + self.token["access_token"],
+            'Cache-Control': "no-cache"
+        }
+
+    def refreshToken(self, stale=None):
+        """ Replace the access token. Several page workers can find out the
+            token is bad at the same time, so only the first one fetches a new
+            token, the others pick up the one it got.
+            Parameters
+            ----------
+            stale : string, optional
+                The access token the caller found to be bad. If self.token has
+                already moved on from it, it is not fetched again.
+
+            Returns
+            -------
+            dictonary or None
+                The current token
+        """
+        with self.token_lock:
+            if stale is None or self.token is None or self.token.get("access_token") == stale:
+                self.logger.info("Refreshing access token.")
+                token = self.fetchToken()
+                if token is not None:
+                    self.token = token
+            return self.token
+
+    def ensureToken(self):
+        """ Refresh the token shortly before it expires instead of letting
+            requests fail. See the TOKEN_REFRESH_MARGIN setting.
+        """
+        token = self.token
+        if self.tokens.expiresAt(token) is not None and not self.tokens.isFresh(token):
+            self.logger.info("Access token is about to expire.")
+            self.refreshToken(stale=token["access_token"])
+
+    def apiGet(self, url):
+        """ GET an API url with the current token. If the API rejects the
+            token (401) it is refreshed and the request is made once more.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint including any querystring
+
+            Returns
+            -------
+            requests.Response
+        """
+        token = self.token["access_token"]
+        self.throttle()
+        r = self.s.request("GET", str(self.url) + str(url), headers=self.authHeaders())
+        if r.status_code == 401:
+            self.logger.info("Access token was rejected, refreshing it and retrying.")
+            self.refreshToken(stale=token)
+            self.throttle()
+            r = self.s.request("GET", str(self.url) + str(url), headers=self.authHeaders())
+        return r
+
+    def throttle(self):
+        """ Wait for the rate limiter (see the RATE_LIMIT setting), if any. """
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+    def getPage(self, url, page):
+        """ Fetch a single page of an endpoint. Rate limited (429), server
+            errors (5xx) and connection failures are retried (see the
+            PAGE_RETRIES setting) with exponential backoff and jitter, or
+            after the Retry-After the API asks for, so one bad page does not
+            cost us the pages we already have.
+            Parameters
+            ----------
+            url : Query or string
+                The query, or URL of the API endpoint including any querystring
+            page : int
+                The page number to fetch, starting at 1
+
+            Returns
+            -------
+            dictonary or None
+                The decoded page (with "meta" and "items") or None for failure.
+        """
+        query = url if isinstance(url, Query) else Query.fromUrl(url)
+        url = query.url(page)                                                  # built fresh for every page, sorted so it doubles as the cache key
+
+        if self.cache is not None:                                              # see the USE_CACHE setting
+            import sqlite3                                                      # already loaded with the cache
+            try:
+                data = self.cache.get(url)
+            except sqlite3.Error:                                               # a broken cache costs a request, not the page
+                self.logger.warning("getPage - reading the cache failed, fetching page " + str(page) + ".", exc_info=True)
+                data = None
+            if data is not None:
+                return data
+
+        retries = int(self.settings.get("PAGE_RETRIES", 3))
+        for attempt in range(1, retries + 1):
+            wait = None                                                         # Retry-After from the API
+            try:
+                r = self.apiGet(url)
+                self.logger.info("Got status code " + str(r.status_code) + " from request for page " + str(page) + ".")
+                if r.status_code == 404:
+                    msg = """
+                            Received 404 not found. It is likely this request
+                            is not available in your version of the ezyVet API.
+                            Please refer to the README for more information.
+                        """
+                    self.logger.info(textwrap.dedent(msg))
+                    return None
+                elif r.status_code == 429 or r.status_code >= 500:
+                    wait = retryAfter(r.headers.get("Retry-After"))
+                    self.logger.error("getPage - Unable to retreive page " + str(page) + ", received " + str(r.status_code) + " " + str(r.content))
+                    if r.status_code == 429 and self.limiter is not None:
+                        self.limiter.pause(wait if wait is not None else backoffDelay(attempt))    # hold back every worker, not just this one
+                elif r.status_code != 200:
+                    self.logger.error("getPage - Unable to retreive page " + str(page) + ", received " + str(r.content))
+                    return None                                                 # retrying won't fix a bad request
+                else:
+                    if self.logger.isEnabledFor(logging.DEBUG):                 # don't copy every page just to throw it away
+                        self.logger.debug("GetData Response: " + str(len(r.content)) + " bytes for page " + str(page) + ".")
+                    data = self.decode(r.content)
+                    if "meta" not in data or "items" not in data:
+                        self.logger.error("getPage - meta or items not in data.")
+                        return None
+                    if self.cache is not None:
+                        try:
+                            self.cache.put(url, data)
+                        except sqlite3.Error:
+                            self.logger.warning("getPage - caching page " + str(page) + " failed.", exc_info=True)
+                    return data
+            except requests.exceptions.RequestException:
+                self.logger.error("getPage - request for page " + str(page) + " failed.", exc_info=True)
+
+            if attempt < retries:
+                delay = backoffDelay(attempt, wait, cap=float(self.settings.get("MAX_BACKOFF", 60)))
+                self.logger.info("Retrying page " + str(page) + " in " + str(round(delay, 2)) + " seconds (attempt " + str(attempt + 1) + " of " + str(retries) + ").")
+                time.sleep(delay)
+
+        self.logger.error("getPage - giving up on page " + str(page) + " after " + str(retries) + " attempts.")
+        return None
+
+    def iterPages(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
+        """ Generator that fetches the pages of an endpoint and yields the
+            "items" of each page, in page order, as they arrive. Once the first
+            page tells us how many pages there are, the rest are fetched by a
+            pool of workers that never runs more than `workers` pages ahead of
+            the caller, so memory use does not grow with the result size.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            maxpages : int
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            workers : int, optional
+                The number of pages fetched at the same time. Defaults to the
+                PAGE_WORKERS setting.
+            fields : list, optional
+                Keep only these fields of each record, e.g. ["id", "modified_at"].
+                The API has no field selection, so the rest is dropped as soon
+                as the page is parsed.
+            maxrecords : int, optional
+                The maximum number of records to return, used instead of
+                maxpages. Pages are as large as the PAGE_SIZE setting allows,
+                or just maxrecords long when that is smaller.
+
+            Yields
+            ------
+            array or None
+                The "items" of each page. None is yielded (and the generator
+                stops) when a page could not be fetched.
+        """
+        if self.mirror is not None:                                             # see the USE_MIRROR setting
+            items = self.mirror.lookup(url, filter)
+            if items is not None:
+                if maxrecords is None and maxpages is not None:                 # as many records as maxpages API pages would hold
+                    maxrecords = maxpages * (pageSize(self.settings.get("PAGE_SIZE", MAX_LIMIT)) or 10)
+                yield self.project(url, items if maxrecords is None else items[:maxrecords], fields)
+                return
+
+        for page, pages, items in self.iterNumberedPages(url, filter=filter, maxpages=maxpages, workers=workers, maxrecords=maxrecords):
+            if self.mirror is not None and items:
+                self.mirror.save(url, items)                                    # the mirror keeps whole records
+            yield self.project(url, items, fields)
+
+    def project(self, url, items, fields):
+        """ Drop all but the given fields from each record of a page. """
+        if not fields or items is None:
+            return items
+        name = url.strip("/")
+        return [project(name, item, fields) for item in items]
+
+    def iterNumberedPages(self, url, filter=None, maxpages=1, workers=None, start=1, maxrecords=None, limit=None):
+        """ Same as iterPages() but yields (page number, total pages, items)
+            and can start part way through the results, which is what
+            resumable exports need.
+            Parameters
+            ----------
+            start : int, optional
+                The first page to fetch. Defaults to 1.
+            maxrecords : int, optional
+                Stop after this many records, used instead of maxpages.
+            limit : int, optional
+                Records per page. Defaults to the PAGE_SIZE setting, or
+                maxrecords when that is smaller. A resumed export passes the
+                size its saved pages were fetched with.
+
+            Yields
+            ------
+            tuple
+                (page, pages, items). items is None (and the generator
+                stops) when a page could not be fetched.
+        """
+        self.logger.debug("Base url: " + str(url))
+        if filter is not None:
+            self.logger.info("Got filter: " + pformat(filter))
+        if maxrecords is not None:
+            maxpages = None                                                     # the record count decides
+        if limit is None:
+            limit = pageSize(self.settings.get("PAGE_SIZE", MAX_LIMIT), maxrecords)
+        url = Query(url, filter, limit)
+        self.logger.debug("url with query: " + str(url))
+        self.ensureToken()
+
+        ''' We don't know how many pages of data we will get until we make
+            our first call to the endpoint. Once the first page tells us,
+            the rest are handed to a pool of workers and collected in page
+            order.
+        '''
+        data = self.getPage(url, start)
+        if data is None:
+            yield start, None, None
+            return
+        pages = int(data["meta"]["items_page_total"])
+        if maxpages is not None:
+            pages = min(pages, maxpages)
+        remaining = None
+        if maxrecords is not None:
+            size = max(1, len(data["items"]))                                   # what the API really gave us per page
+            pages = min(pages, start - 1 + -(-maxrecords // size))
+            remaining = maxrecords - len(data["items"])
+            data["items"] = data["items"][:maxrecords]
+        yield start, pages, data["items"]
+
+        if pages <= start:                                                      # if it is the last or only page we are done
+            return
+
+        if workers is None:
+            workers = self.settings.get("PAGE_WORKERS", 4)
+        workers = max(1, min(int(workers), pages - start))
+        self.logger.info("Fetching pages " + str(start + 1) + " to " + str(pages) + " using " + str(workers) + " workers.")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            page = start + 1                                                    # next page to hand to the pool
+            while page <= pages and len(pending) < workers:
+                pending.append(pool.submit(self.getPage, url, page))
+                page += 1
+            done = start                                                        # last page yielded
+            while pending:
+                data = pending.popleft().result()
+                if data is None:
+                    self.logger.error("iterPages - page " + str(done + 1) + " failed, stopping after page " + str(done) + ".")
+                    for future in pending:
+                        future.cancel()
+                    yield done + 1, pages, None
+                    return
+                if page <= pages:                                               # keep the pool busy while the caller works
+                    pending.append(pool.submit(self.getPage, url, page))
+                    page += 1
+                done += 1
+                items = data["items"]
+                if remaining is not None:
+                    items = items[:max(0, remaining)]
+                    remaining -= len(items)
+                yield done, pages, items
+
+    def getData(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
         """ Helper function to get data from all pages and return it
             to the caller as JSON. This helps prevent duplicate core
             get functions. This function is somewhat specific to how the
@@ -249,79 +632,239 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10 records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            workers : int, optional
+                The number of pages fetched at the same time once the first
+                page tells us how many there are. Defaults to the PAGE_WORKERS
+                setting.
+            fields : list, optional
+                Keep only these fields of each record, see iterPages().
+            maxrecords : int, optional
+                The maximum number of records to return, see iterPages().
 
             Returns
             -------
             array or None
-                The "items" data  in an array of dictionaries.
+                The "items" data  in an array of dictionaries, or None if any
+                page could not be fetched after its retries.
         """
         try:
-            self.logger.debug("Base url: " + str(url))
-            if filter is not None:
-                self.logger.info("Got filter: " + pformat(filter))
-                qs = urlencode(filter)
-                self.logger.info("Adding querystring to URL: " + qs)
-                url += "?" + str(qs)
-            self.logger.debug("url with query: " + str(url))
-
-            headers = {
-                "authorization": "Bearer " + self.token["access_token"],
-                'Cache-Control': "no-cache"
-            }
-
-            ''' The while loop below is a little weird. This is because we don't
-                know how many pages of data we will get until we make our first
-                call to the endpoint. To deal with it, we have a loop that
-                determins at the end if it should break.
-            '''
-            i = 1               # current page counter
-            pages = 0           # total pages
             items = []          # array of items we will return
-            while True:
-                if i > 1:       # this is not our first page
-                    if '?' in url:
-                        url += str('&page=' + str(i))
-                    else:
-                        url += str('?page=' + str(i))
-
-                r = requests.request("GET", str(self.url) + str(url), headers=headers)
-                self.logger.info("Got status code " + str(r.status_code) + " from request.")
-                if r.status_code == 404:
-                    msg = """
-                            Received 404 not found. It is likely this request
-                            is not available in your version of the ezyVet API.
-                            Please refer to the README for more information.
-                        """
-                    self.logger.info(textwrap.dedent(msg))
-                    return None
-                elif r.status_code != 200:
-                    self.logger.error("getData - Unable to retreive data, received " + str(r.content))
+            for page in self.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, fields=fields, maxrecords=maxrecords):
+                if page is None:                                                # a short list would look complete
+                    self.logger.error("getData - a page of " + str(url) + " could not be fetched, returning None. Use the exporter to keep partial results.")
                     return None
+                items.extend(page)
 
-                self.logger.debug("GetData Response: " + str(r.content))
+            return items
 
-                data = json.loads(r.text)
-                self.logger.debug("Got data " + r.text)
+        except:
+            self.logger.error("getData - something went wrong.", exc_info=True)
 
-                if "meta" not in data or "items" not in data:
-                    self.logger.error("getData - meta or items not in data.")
-                    return None
+    def iterData(self, url, filter=None, maxpages=1, workers=None, fields=None, maxrecords=None):
+        """ Streaming version of getData(). Records are yielded one at a time
+            as each page arrives instead of being collected into a list, so
+            memory stays flat however many records the query returns.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            maxpages : int
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            workers : int, optional
+                The number of pages fetched at the same time. Defaults to the
+                PAGE_WORKERS setting.
+            fields : list, optional
+                Keep only these fields of each record, see iterPages().
+            maxrecords : int, optional
+                The maximum number of records to return, see iterPages().
+
+            Yields
+            ------
+            dictonary
+                Each record from the "items" data.
+
+            Raises
+            ------
+            IOError
+                If a page could not be fetched, after the records before it
+                were yielded, so a short stream can't pass for a whole one.
+        """
+        try:
+            for page in self.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, fields=fields, maxrecords=maxrecords):
+                if page is None:
+                    raise IOError("iterData - a page of " + str(url) + " could not be fetched, the records stop short.")
+                for item in page:
+                    yield item
+        except IOError as err:
+            self.logger.error(str(err))
+            raise
+        except Exception:
+            self.logger.error("iterData - something went wrong.", exc_info=True)
+            raise
+
+    def fetchIn(self, resource, field, values, filter=None, workers=None):
+        """ Fetch the records of a resource whose `field` is any of `values`
+            with as few requests as possible. The values are deduplicated and
+            split into chunks sent as {field: {"in": [...]}} filters, each chunk
+            as long as the URL length limit allows (see the MAX_URL_LENGTH
+            setting), and the chunks are fetched at the same time.
+            Parameters
+            ----------
+            resource : string
+                The API endpoint, e.g. "/invoiceline"
+            field : string
+                The field to match, e.g. "invoice_id"
+            values : iterable
+                The values to match, duplicates and None are fine
+            filter : dictonary, optional
+                More filter arguments to send with every chunk
+            workers : int, optional
+                Chunks fetched at the same time. Defaults to the PAGE_WORKERS
+                setting.
 
-                for d in data["items"]:
-                    items.append(d)
+            Returns
+            -------
+            array or None
+                The matching records. None if any chunk failed, a chunk
+                with a page that could not be fetched counts as failed
+                (getData() never returns part of a chunk).
+        """
+        try:
+            if not resource.startswith("/"):
+                resource = "/" + resource
+            wanted = []
+            seen = set()
+            for value in values:
+                if value is not None and value != "" and str(value) not in seen:
+                    seen.add(str(value))
+                    wanted.append(int(value) if str(value).isdigit() else value)
+            if not wanted:
+                return []
+
+            chunks = idChunks(wanted, len(self.url) + len(Query(resource, filter).url()) + len(field) + 20,
+                              int(self.settings.get("MAX_URL_LENGTH", 2000)))
+            if workers is None:
+                workers = self.settings.get("PAGE_WORKERS", 4)
+            workers = max(1, min(int(workers), len(chunks)))
+            self.logger.info("Fetching " + resource[1:] + " records for " + str(len(wanted)) + " " + field + " values in " + str(len(chunks)) + " requests.")
+
+            def fetch(chunk):
+                query = dict(filter or {})
+                query[field] = {"in": chunk}
+                return self.getData(resource, filter=query, maxpages=None, workers=1)
+
+            records = []
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for items in pool.map(fetch, chunks):
+                    if items is None:
+                        self.logger.error("fetchIn - a chunk of " + resource[1:] + " " + field + " values failed.")
+                        return None
+                    records.extend(items)
+            return records
 
-                pages = int(data["meta"]["items_page_total"])
-                if pages <= 1 or i == pages or i==maxpages:            # if it is the last or only page break the loop
-                    break
-                i += 1
+        except:
+            self.logger.error("fetchIn - something went wrong.", exc_info=True)
 
-            return items
+    def fetchByIds(self, resource, ids, filter=None, workers=None):
+        """ Fetch many records of a resource by id with as few requests as
+            possible, see fetchIn().
+            Parameters
+            ----------
+            resource : string
+                The API endpoint, e.g. "/animal"
+            ids : iterable
+                The ids to fetch, duplicates are fine
+            filter : dictonary, optional
+                More filter arguments to send with every chunk
+            workers : int, optional
+                Chunks fetched at the same time. Defaults to the PAGE_WORKERS
+                setting.
+
+            Returns
+            -------
+            dictonary or None
+                Record id (as a string) to record. Ids that don't exist are
+                left out. None if any chunk failed.
+        """
+        try:
+            items = self.fetchIn(resource, "id", ids, filter=filter, workers=workers)
+            if items is None:
+                return None
+            name = resource.strip("/")
+            records = {}
+            for item in items:
+                records[str(unwrap(name, item)["id"])] = item
+            return records
 
         except:
-            self.logger.error("getData - something went wrong.", exc_info=True)
+            self.logger.error("fetchByIds - something went wrong.", exc_info=True)
+
+    def expandFields(self, resource, fields, expand):
+        """ Projected fields plus the keys expand() needs to link records. """
+        if not fields or not expand:
+            return fields
+        keys = ["id"] + [RELATIONSHIPS.get(resource, {}).get(relation, (None, "id"))[1] for relation in expand]
+        return list(fields) + [key for key in keys if key not in fields]
+
+    def expand(self, resource, items, expand):
+        """ Attach related records to each record, one batched query per
+            related resource instead of one per record. The relationships each
+            resource has are declared in resources.RELATIONSHIPS; a related
+            record's fields are added to the parent's fields under the
+            relationship name ("many" relationships as a list).
+            Parameters
+            ----------
+            resource : string
+                The API endpoint the items came from, e.g. "/invoice"
+            items : array
+                Records as returned by getData(), changed in place
+            expand : list
+                Relationship names, e.g. ["contact", "lines"]
 
-    def getAddress(self, filter=None, maxpages=1):
+            Returns
+            -------
+            array or None
+                The items, or None if a related fetch failed (an empty
+                relation would look like a record with no contact or lines).
+        """
+        if not items or not expand:
+            return items
+        name = resource.strip("/")
+        declared = RELATIONSHIPS.get(resource, {})
+        parents = [unwrap(name, item) for item in items]
+        for relation in expand:
+            if relation not in declared:
+                self.logger.error("Can't expand " + str(relation) + " on " + resource + ", choose from: " + ", ".join(sorted(declared)))
+                continue
+            related, key, kind = declared[relation]
+            related_name = related.strip("/")
+            if kind == "one":                                                   # parent[key] is the related record's id
+                found = self.fetchByIds(related, [p.get(key) for p in parents])
+                if found is None:
+                    self.logger.error("expand - fetching " + relation + " for " + resource + " failed.")
+                    return None
+                for p in parents:
+                    record = found.get(str(p.get(key)))
+                    p[relation] = unwrap(related_name, record) if record is not None else None
+            else:                                                               # related[key] is the parent's id
+                found = self.fetchIn(related, key, [p.get("id") for p in parents])
+                if found is None:
+                    self.logger.error("expand - fetching " + relation + " for " + resource + " failed.")
+                    return None
+                children = {}
+                for record in found:
+                    fields = unwrap(related_name, record)
+                    children.setdefault(str(fields.get(key)), []).append(fields)
+                for p in parents:
+                    p[relation] = children.get(str(p.get("id")), [])
+        return items
+
+    def getAddress(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get addresses(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#address
 
@@ -330,8 +873,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -340,7 +887,7 @@ class ezyvet:
         """
         try:
             url = "/address"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -348,7 +895,13 @@ class ezyvet:
         except:
             self.logger.error("getAddress - something went wrong.", exc_info=True)
 
-    def getAnimal(self, filter=None, maxpages=1):
+    def iterAddress(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over address(es) one record at a time as pages arrive.
+            Takes the same arguments as getAddress().
+        """
+        return self.iterData("/address", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getAnimal(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get animal(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#animal
 
@@ -357,8 +910,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -367,7 +924,7 @@ class ezyvet:
         """
         try:
             url = "/animal"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -375,7 +932,13 @@ class ezyvet:
         except:
             self.logger.error("getAnimal - something went wrong.", exc_info=True)
 
-    def getAnimalColor(self, filter=None, maxpages=1):
+    def iterAnimal(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over animal(s) one record at a time as pages arrive.
+            Takes the same arguments as getAnimal().
+        """
+        return self.iterData("/animal", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getAnimalColor(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get animal color(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#animalcolour
 
@@ -384,8 +947,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -394,7 +961,7 @@ class ezyvet:
         """
         try:
             url = "/animalcolor"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -402,7 +969,13 @@ class ezyvet:
         except:
             self.logger.error("getAnimalColor - something went wrong.", exc_info=True)
 
-    def getAppointment(self, filter=None, maxpages=1):
+    def iterAnimalColor(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over animal color(s) one record at a time as pages arrive.
+            Takes the same arguments as getAnimalColor().
+        """
+        return self.iterData("/animalcolor", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getAppointment(self, filter=None, maxpages=1, expand=None, fields=None, maxrecords=None):
         """ Get appointment(s) given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#appointment
 
@@ -411,8 +984,15 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            expand : list, optional
+                Related records to attach to each appointment, see
+                resources.RELATIONSHIPS.
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -421,7 +1001,8 @@ class ezyvet:
         """
         try:
             url = "/appointment"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=self.expandFields(url, fields, expand),maxrecords=maxrecords)
+            data = self.expand(url, data, expand)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -429,6 +1010,12 @@ class ezyvet:
         except:
             self.logger.error("getAppointment - something went wrong.", exc_info=True)
 
+    def iterAppointment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over appointment(s) one record at a time as pages arrive.
+            Takes the same arguments as getAppointment().
+        """
+        return self.iterData("/appointment", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
     def getApptStatus(self):
         """ Get all of the appointment status codes.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#appointmentstatus
@@ -447,6 +1034,12 @@ class ezyvet:
         except:
             self.logger.error("getApptStatus went wrong.", exc_info=True)
 
+    def iterApptStatus(self):
+        """ Iterate over appointment status codes one record at a time as pages arrive.
+            Takes the same arguments as getApptStatus().
+        """
+        return self.iterData("/appointmentstatus", maxpages=10)
+
     def getApptType(self):
         """ Get all of the appointment type codes.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#appointmenttype
@@ -465,7 +1058,13 @@ class ezyvet:
         except:
             self.logger.error("getApptType went wrong.", exc_info=True)
 
-    def getAssessment(self, filter=None, maxpages=1):
+    def iterApptType(self):
+        """ Iterate over appointment types one record at a time as pages arrive.
+            Takes the same arguments as getApptType().
+        """
+        return self.iterData("/appointmenttype", maxpages=10)
+
+    def getAssessment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get assessment(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#assessment
 
@@ -474,8 +1073,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -484,7 +1087,7 @@ class ezyvet:
         """
         try:
             url = "/assessment"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
 
@@ -493,7 +1096,13 @@ class ezyvet:
         except:
             self.logger.error("getAssessment - something went wrong.", exc_info=True)
 
-    def getAttachment(self, filter=None, maxpages=1):
+    def iterAssessment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over assessment(s) one record at a time as pages arrive.
+            Takes the same arguments as getAssessment().
+        """
+        return self.iterData("/assessment", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getAttachment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get attachment(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#attachment
 
@@ -502,7 +1111,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10 records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -511,7 +1125,7 @@ class ezyvet:
         """
         try:
             url = "/attachment"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
 
@@ -520,7 +1134,13 @@ class ezyvet:
         except:
             self.logger.error("getAttachment - something went wrong.", exc_info=True)
 
-    def getBreed(self, filter=None, maxpages=1):
+    def iterAttachment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over attachment(s) one record at a time as pages arrive.
+            Takes the same arguments as getAttachment().
+        """
+        return self.iterData("/attachment", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getBreed(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get breed(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#breed
 
@@ -529,7 +1149,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10 records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -538,7 +1163,7 @@ class ezyvet:
         """
         try:
             url = "/breed"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
 
@@ -547,7 +1172,13 @@ class ezyvet:
         except:
             self.logger.error("getBreed - something went wrong.", exc_info=True)
 
-    def getCommunication(self, filter=None, maxpages=1):
+    def iterBreed(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over breed(s) one record at a time as pages arrive.
+            Takes the same arguments as getBreed().
+        """
+        return self.iterData("/breed", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getCommunication(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get communication(s) given filters. Note: This function
             requires the read-communication scope, which is not currently available
             to me. Sadly, I cannot test.
@@ -558,7 +1189,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10 records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -568,7 +1204,7 @@ class ezyvet:
         """
         try:
             url = "/communication"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -576,7 +1212,13 @@ class ezyvet:
         except:
             self.logger.error("getCommunications - something went wrong.", exc_info=True)
 
-    def getConsult(self, filter=None, maxpages=1):
+    def iterCommunication(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over communication(s) one record at a time as pages arrive.
+            Takes the same arguments as getCommunication().
+        """
+        return self.iterData("/communication", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getConsult(self, filter=None, maxpages=1, expand=None, fields=None, maxrecords=None):
         """ Get consult(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#consult
 
@@ -585,7 +1227,15 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10 records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            expand : list, optional
+                Related records to attach to each consult, see
+                resources.RELATIONSHIPS.
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -594,7 +1244,8 @@ class ezyvet:
         """
         try:
             url = "/consult"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=self.expandFields(url, fields, expand),maxrecords=maxrecords)
+            data = self.expand(url, data, expand)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
 
@@ -603,7 +1254,13 @@ class ezyvet:
         except:
             self.logger.error("getConsult - something went wrong.", exc_info=True)
 
-    def getContact(self, filter=None, maxpages=1):
+    def iterConsult(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over consult(s) one record at a time as pages arrive.
+            Takes the same arguments as getConsult().
+        """
+        return self.iterData("/consult", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getContact(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get contact(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#contact
 
@@ -612,8 +1269,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -622,7 +1283,7 @@ class ezyvet:
         """
         try:
             url = "/contact"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -630,7 +1291,13 @@ class ezyvet:
         except:
             self.logger.error("getConsult - something went wrong.", exc_info=True)
 
-    def getContactDetail(self, filter=None, maxpages=1):
+    def iterContact(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over contact(s) one record at a time as pages arrive.
+            Takes the same arguments as getContact().
+        """
+        return self.iterData("/contact", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getContactDetail(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get contact detail(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#contactdetail
 
@@ -639,8 +1306,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -649,7 +1320,7 @@ class ezyvet:
         """
         try:
             url = "/contactdetail"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -657,6 +1328,12 @@ class ezyvet:
         except:
             self.logger.error("getContactDetail - something went wrong.", exc_info=True)
 
+    def iterContactDetail(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over contact detail(s) one record at a time as pages arrive.
+            Takes the same arguments as getContactDetail().
+        """
+        return self.iterData("/contactdetail", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
     def getContactDetailType(self):
         """ Get all of the contact detail types contact method, such as “Mobile” or “Email”.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#contactdetailtype
@@ -675,7 +1352,13 @@ class ezyvet:
         except:
             self.logger.error("getContactDetailType something went wrong.", exc_info=True)
 
-    def getCountry(self, filter=None, maxpages=1):
+    def iterContactDetailType(self):
+        """ Iterate over contact detail types one record at a time as pages arrive.
+            Takes the same arguments as getContactDetailType().
+        """
+        return self.iterData("/contactdetailtype", maxpages=10)
+
+    def getCountry(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get country(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#country
 
@@ -684,8 +1367,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -694,7 +1381,7 @@ class ezyvet:
         """
         try:
             url = "/country"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -702,7 +1389,13 @@ class ezyvet:
         except:
             self.logger.error("getCountry - something went wrong.", exc_info=True)
 
-    def getDiagnostic(self, filter=None, maxpages=1):
+    def iterCountry(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over countries one record at a time as pages arrive.
+            Takes the same arguments as getCountry().
+        """
+        return self.iterData("/country", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getDiagnostic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get diagnostic(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#diagnostic
             Note: This endpoint presently returns a 404, support contacted 10/31/18.
@@ -712,8 +1405,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -722,7 +1419,7 @@ class ezyvet:
         """
         try:
             url = "/diagnostic"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -730,7 +1427,13 @@ class ezyvet:
         except:
             self.logger.error("getDiagnostic - something went wrong.", exc_info=True)
 
-    def getDiagnosticResult(self, filter=None, maxpages=1):
+    def iterDiagnostic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over diagnostic(s) one record at a time as pages arrive.
+            Takes the same arguments as getDiagnostic().
+        """
+        return self.iterData("/diagnostic", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getDiagnosticResult(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get diagnostic result(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#diagnosticresult
 
@@ -739,8 +1442,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -749,7 +1456,7 @@ class ezyvet:
         """
         try:
             url = "/diagnosticresult"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -757,7 +1464,13 @@ class ezyvet:
         except:
             self.logger.error("getDiagnosticResult - something went wrong.", exc_info=True)
 
-    def getDiagnosticResultItem(self, filter=None, maxpages=1):
+    def iterDiagnosticResult(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over diagnostic result(s) one record at a time as pages arrive.
+            Takes the same arguments as getDiagnosticResult().
+        """
+        return self.iterData("/diagnosticresult", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getDiagnosticResultItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get diagnostic result items(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#diagnosticresultitem
 
@@ -766,8 +1479,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -776,7 +1493,7 @@ class ezyvet:
         """
         try:
             url = "/diagnosticresultitem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -784,7 +1501,13 @@ class ezyvet:
         except:
             self.logger.error("getDiagnosticResultItem - something went wrong.", exc_info=True)
 
-    def getDiagnosticRequest(self, filter=None, maxpages=1):
+    def iterDiagnosticResultItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over diagnostic result item(s) one record at a time as pages arrive.
+            Takes the same arguments as getDiagnosticResultItem().
+        """
+        return self.iterData("/diagnosticresultitem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getDiagnosticRequest(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get diagnostic request(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#diagnosticrequest
 
@@ -793,8 +1516,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -803,7 +1530,7 @@ class ezyvet:
         """
         try:
             url = "/diagnosticrequest"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -811,7 +1538,13 @@ class ezyvet:
         except:
             self.logger.error("getDiagnosticRequst - something went wrong.", exc_info=True)
 
-    def getDiagnosticRequstItem(self, filter=None, maxpages=1):
+    def iterDiagnosticRequest(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over diagnostic request(s) one record at a time as pages arrive.
+            Takes the same arguments as getDiagnosticRequest().
+        """
+        return self.iterData("/diagnosticrequest", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getDiagnosticRequstItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get diagnostic request item(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#diagnosticrequestitem
 
@@ -820,8 +1553,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -830,7 +1567,7 @@ class ezyvet:
         """
         try:
             url = "/diagnosticrequestitem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -838,7 +1575,13 @@ class ezyvet:
         except:
             self.logger.error("getDiagnosticRequstItem - something went wrong.", exc_info=True)
 
-    def getFile(self, filter=None, maxpages=1):
+    def iterDiagnosticRequstItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over diagnostic request item(s) one record at a time as pages arrive.
+            Takes the same arguments as getDiagnosticRequstItem().
+        """
+        return self.iterData("/diagnosticrequestitem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getFile(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get files(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#fetch-a-file
 
@@ -847,8 +1590,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -857,7 +1604,7 @@ class ezyvet:
         """
         try:
             url = "/file"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -865,7 +1612,13 @@ class ezyvet:
         except:
             self.logger.error("getFile - something went wrong.", exc_info=True)
 
-    def getIntegratedDiagnostic(self, filter=None, maxpages=1):
+    def iterFile(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over file(s) one record at a time as pages arrive.
+            Takes the same arguments as getFile().
+        """
+        return self.iterData("/file", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getIntegratedDiagnostic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get integrated partner diagnostic(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#integrateddiagnostic
 
@@ -874,8 +1627,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -884,7 +1641,7 @@ class ezyvet:
         """
         try:
             url = "/integrateddiagnostic"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -892,7 +1649,13 @@ class ezyvet:
         except:
             self.logger.error("getIntegratedDiagnostic - something went wrong.", exc_info=True)
 
-    def getHealthStatus(self, filter=None, maxpages=1):
+    def iterIntegratedDiagnostic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over integrated partner diagnostic(s) one record at a time as pages arrive.
+            Takes the same arguments as getIntegratedDiagnostic().
+        """
+        return self.iterData("/integrateddiagnostic", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getHealthStatus(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get health status metrics(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#healthstatus
 
@@ -901,8 +1664,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -911,7 +1678,7 @@ class ezyvet:
         """
         try:
             url = "/healthstatus"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -919,7 +1686,13 @@ class ezyvet:
         except:
             self.logger.error("getHealthStatus - something went wrong.", exc_info=True)
 
-    def getHistory(self, filter=None, maxpages=1):
+    def iterHealthStatus(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over health status metric(s) one record at a time as pages arrive.
+            Takes the same arguments as getHealthStatus().
+        """
+        return self.iterData("/healthstatus", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getHistory(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get history result(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#history
 
@@ -928,8 +1701,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -938,7 +1715,7 @@ class ezyvet:
         """
         try:
             url = "/history"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -946,7 +1723,13 @@ class ezyvet:
         except:
             self.logger.error("getHistory - something went wrong.", exc_info=True)
 
-    def getInvoice(self, filter=None, maxpages=1):
+    def iterHistory(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over history record(s) one record at a time as pages arrive.
+            Takes the same arguments as getHistory().
+        """
+        return self.iterData("/history", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getInvoice(self, filter=None, maxpages=1, expand=None, fields=None, maxrecords=None):
         """ Get invoice(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#invoice
 
@@ -955,8 +1738,15 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            expand : list, optional
+                Related records to attach to each invoice, see
+                resources.RELATIONSHIPS.
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -965,7 +1755,8 @@ class ezyvet:
         """
         try:
             url = "/invoice"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=self.expandFields(url, fields, expand),maxrecords=maxrecords)
+            data = self.expand(url, data, expand)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -973,7 +1764,13 @@ class ezyvet:
         except:
             self.logger.error("getInvoice - something went wrong.", exc_info=True)
 
-    def getInvoiceLine(self, filter=None, maxpages=1):
+    def iterInvoice(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over invoice(s) one record at a time as pages arrive.
+            Takes the same arguments as getInvoice().
+        """
+        return self.iterData("/invoice", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getInvoiceLine(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get invoice lines(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#invoiceline
 
@@ -982,8 +1779,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -992,7 +1793,7 @@ class ezyvet:
         """
         try:
             url = "/invoiceline"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1000,7 +1801,13 @@ class ezyvet:
         except:
             self.logger.error("getInvoiceLine - something went wrong.", exc_info=True)
 
-    def getOperation(self, filter=None, maxpages=1):
+    def iterInvoiceLine(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over invoice line(s) one record at a time as pages arrive.
+            Takes the same arguments as getInvoiceLine().
+        """
+        return self.iterData("/invoiceline", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getOperation(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get operation(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#operation
 
@@ -1009,8 +1816,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -1019,7 +1830,7 @@ class ezyvet:
         """
         try:
             url = "/operation"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1027,7 +1838,13 @@ class ezyvet:
         except:
             self.logger.error("getOperation - something went wrong.", exc_info=True)
 
-    def getPayment(self, filter=None, maxpages=1):
+    def iterOperation(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over operation(s) one record at a time as pages arrive.
+            Takes the same arguments as getOperation().
+        """
+        return self.iterData("/operation", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPayment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get payment(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#payment
 
@@ -1036,8 +1853,12 @@ class ezyvet:
             filter : dictonary
                 A dictionary of filter arguments to be used in the querystring.
             maxpages : int
-                The maximum number of pages to return. Each page has up to 10
-                records.
+                The maximum number of pages to return. Each page has up to
+                PAGE_SIZE records (200 by default).
+            fields : list, optional
+                The fields to keep in each record, e.g. ["id", "modified_at"].
+            maxrecords : int, optional
+                The maximum number of records to return, instead of maxpages.
 
             Returns
             -------
@@ -1046,7 +1867,7 @@ class ezyvet:
         """
         try:
             url = "/payment"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1054,7 +1875,13 @@ class ezyvet:
         except:
             self.logger.error("getPayment - something went wrong.", exc_info=True)
 
-    def getPaymentMethod(self, filter=None, maxpages=1):
+    def iterPayment(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over payment(s) one record at a time as pages arrive.
+            Takes the same arguments as getPayment().
+        """
+        return self.iterData("/payment", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPaymentMethod(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get payment method(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#paymentmethod
 
@@ -1063,8 +1890,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1073,7 +1904,7 @@ class ezyvet:
         """
         try:
             url = "/paymentmethods"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1081,7 +1912,13 @@ class ezyvet:
         except:
             self.logger.error("getPaymentMethod - something went wrong.", exc_info=True)
 
-    def getPhysicalExam(self, filter=None, maxpages=1):
+    def iterPaymentMethod(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over payment method(s) one record at a time as pages arrive.
+            Takes the same arguments as getPaymentMethod().
+        """
+        return self.iterData("/paymentmethods", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPhysicalExam(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get physical exam(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#physicalexam
 
@@ -1090,8 +1927,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1100,7 +1941,7 @@ class ezyvet:
         """
         try:
             url = "/physicalexam"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1108,7 +1949,13 @@ class ezyvet:
         except:
             self.logger.error("getPhysicalExam - something went wrong.", exc_info=True)
 
-    def getPlan(self, filter=None, maxpages=1):
+    def iterPhysicalExam(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over physical exam(s) one record at a time as pages arrive.
+            Takes the same arguments as getPhysicalExam().
+        """
+        return self.iterData("/physicalexam", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPlan(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get paln(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#plan
 
@@ -1117,8 +1964,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1127,7 +1978,7 @@ class ezyvet:
         """
         try:
             url = "/plan"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1135,7 +1986,13 @@ class ezyvet:
         except:
             self.logger.error("getPlan - something went wrong.", exc_info=True)
 
-    def getPrescription(self, filter=None, maxpages=1):
+    def iterPlan(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over plan(s) one record at a time as pages arrive.
+            Takes the same arguments as getPlan().
+        """
+        return self.iterData("/plan", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPrescription(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get prescription(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#prescription
 
@@ -1144,8 +2001,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1154,7 +2015,7 @@ class ezyvet:
         """
         try:
             url = "/prescription"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1162,7 +2023,13 @@ class ezyvet:
         except:
             self.logger.error("getPrescription - something went wrong.", exc_info=True)
 
-    def getPrescriptionItem(self, filter=None, maxpages=1):
+    def iterPrescription(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over prescription(s) one record at a time as pages arrive.
+            Takes the same arguments as getPrescription().
+        """
+        return self.iterData("/prescription", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPrescriptionItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get prescription item(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#prescriptionitem
 
@@ -1171,8 +2038,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1181,7 +2052,7 @@ class ezyvet:
         """
         try:
             url = "/prescriptionitem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1189,7 +2060,13 @@ class ezyvet:
         except:
             self.logger.error("getPrescriptionItem something went wrong.", exc_info=True)
 
-    def getPresentingProblem(self, filter=None, maxpages=1):
+    def iterPrescriptionItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over prescription item(s) one record at a time as pages arrive.
+            Takes the same arguments as getPrescriptionItem().
+        """
+        return self.iterData("/prescriptionitem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPresentingProblem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get presenting problem(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#presentingproblem
 
@@ -1198,8 +2075,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1208,7 +2089,7 @@ class ezyvet:
         """
         try:
             url = "/presentingproblem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1216,7 +2097,13 @@ class ezyvet:
         except:
             self.logger.error("getPresentingProblem - something went wrong.", exc_info=True)
 
-    def getPresentingProblemLink(self, filter=None, maxpages=1):
+    def iterPresentingProblem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over presenting problem(s) one record at a time as pages arrive.
+            Takes the same arguments as getPresentingProblem().
+        """
+        return self.iterData("/presentingproblem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPresentingProblemLink(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get presenting problem link(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#presentingproblemlink
 
@@ -1225,8 +2112,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1235,7 +2126,7 @@ class ezyvet:
         """
         try:
             url = "/presentingproblemlink"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1243,7 +2134,13 @@ class ezyvet:
         except:
             self.logger.error("getPresentingProblemLink - something went wrong.", exc_info=True)
 
-    def getProduct(self, filter=None, maxpages=1):
+    def iterPresentingProblemLink(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over presenting problem link(s) one record at a time as pages arrive.
+            Takes the same arguments as getPresentingProblemLink().
+        """
+        return self.iterData("/presentingproblemlink", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getProduct(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get product(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#product
 
@@ -1252,8 +2149,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1262,7 +2163,7 @@ class ezyvet:
         """
         try:
             url = "/product"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1270,7 +2171,13 @@ class ezyvet:
         except:
             self.logger.error("getProduct - something went wrong.", exc_info=True)
 
-    def getProductGroup(self, filter=None, maxpages=1):
+    def iterProduct(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over product(s) one record at a time as pages arrive.
+            Takes the same arguments as getProduct().
+        """
+        return self.iterData("/product", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getProductGroup(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get product groups(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#productgroup
 
@@ -1279,8 +2186,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1289,7 +2200,7 @@ class ezyvet:
         """
         try:
             url = "/productgroup"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1297,7 +2208,13 @@ class ezyvet:
         except:
             self.logger.error("getProductGroup - something went wrong.", exc_info=True)
 
-    def getPurchaseOrder(self, filter=None, maxpages=1):
+    def iterProductGroup(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over product group(s) one record at a time as pages arrive.
+            Takes the same arguments as getProductGroup().
+        """
+        return self.iterData("/productgroup", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPurchaseOrder(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get purchase order(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#purchaseorder
 
@@ -1306,8 +2223,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1316,7 +2237,7 @@ class ezyvet:
         """
         try:
             url = "/purchaseorder"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1324,7 +2245,13 @@ class ezyvet:
         except:
             self.logger.error("getPurchaseOrder - something went wrong.", exc_info=True)
 
-    def getPurchaseOrderItem(self, filter=None, maxpages=1):
+    def iterPurchaseOrder(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over purchase order(s) one record at a time as pages arrive.
+            Takes the same arguments as getPurchaseOrder().
+        """
+        return self.iterData("/purchaseorder", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getPurchaseOrderItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get purchase order items(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#purchaseorderitem
 
@@ -1333,8 +2260,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1343,7 +2274,7 @@ class ezyvet:
         """
         try:
             url = "/purchaseorderitem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1351,7 +2282,13 @@ class ezyvet:
         except:
             self.logger.error("getPurchaseOrderItem - something went wrong.", exc_info=True)
 
-    def getReceiveInvoice(self, filter=None, maxpages=1):
+    def iterPurchaseOrderItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over purchase order item(s) one record at a time as pages arrive.
+            Takes the same arguments as getPurchaseOrderItem().
+        """
+        return self.iterData("/purchaseorderitem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getReceiveInvoice(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get receive invoice(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#receiveinvoice
 
@@ -1360,8 +2297,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1370,7 +2311,7 @@ class ezyvet:
         """
         try:
             url = "/receiveinvoice"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1378,7 +2319,13 @@ class ezyvet:
         except:
             self.logger.error("getReceiveInvoice something went wrong.", exc_info=True)
 
-    def getReceiveInvoiceItem(self, filter=None, maxpages=1):
+    def iterReceiveInvoice(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over receive invoice(s) one record at a time as pages arrive.
+            Takes the same arguments as getReceiveInvoice().
+        """
+        return self.iterData("/receiveinvoice", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getReceiveInvoiceItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get receive invoice items(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#receiveinvoiceitem
 
@@ -1387,8 +2334,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1397,7 +2348,7 @@ class ezyvet:
         """
         try:
             url = "/receiveinvoiceitem"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1405,7 +2356,13 @@ class ezyvet:
         except:
             self.logger.error("getReceiveInvoiceItem - something went wrong.", exc_info=True)
 
-    def getResource(self, filter=None, maxpages=1):
+    def iterReceiveInvoiceItem(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over receive invoice item(s) one record at a time as pages arrive.
+            Takes the same arguments as getReceiveInvoiceItem().
+        """
+        return self.iterData("/receiveinvoiceitem", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getResource(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get resource(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#resource
 
@@ -1414,8 +2371,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1424,7 +2385,7 @@ class ezyvet:
         """
         try:
             url = "/resource"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1432,7 +2393,13 @@ class ezyvet:
         except:
             self.logger.error("getResource - something went wrong.", exc_info=True)
 
-    def getSeparation(self, filter=None, maxpages=1):
+    def iterResource(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over resource(s) one record at a time as pages arrive.
+            Takes the same arguments as getResource().
+        """
+        return self.iterData("/resource", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getSeparation(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get separation(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#separation
 
@@ -1441,8 +2408,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1451,7 +2422,7 @@ class ezyvet:
         """
         try:
             url = "/separation"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1459,7 +2430,13 @@ class ezyvet:
         except:
             self.logger.error("getSeparation - something went wrong.", exc_info=True)
 
-    def getSex(self, filter=None, maxpages=1):
+    def iterSeparation(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over separation(s) one record at a time as pages arrive.
+            Takes the same arguments as getSeparation().
+        """
+        return self.iterData("/separation", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getSex(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get sex(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#sex
 
@@ -1468,8 +2445,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1478,7 +2459,7 @@ class ezyvet:
         """
         try:
             url = "/sex"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1486,7 +2467,13 @@ class ezyvet:
         except:
             self.logger.error("getSex -  something went wrong.", exc_info=True)
 
-    def getSpecies(self, filter=None, maxpages=1):
+    def iterSex(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over sex(es) one record at a time as pages arrive.
+            Takes the same arguments as getSex().
+        """
+        return self.iterData("/sex", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getSpecies(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get species(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#species
 
@@ -1495,8 +2482,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1505,7 +2496,7 @@ class ezyvet:
         """
         try:
             url = "/species"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1513,7 +2504,13 @@ class ezyvet:
         except:
             self.logger.error("getSpecies -  something went wrong.", exc_info=True)
 
-    def getTag(self, filter=None, maxpages=1):
+    def iterSpecies(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over species one record at a time as pages arrive.
+            Takes the same arguments as getSpecies().
+        """
+        return self.iterData("/species", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getTag(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get tag(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#tag
 
@@ -1522,8 +2519,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1532,7 +2533,7 @@ class ezyvet:
         """
         try:
             url = "/tag"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1540,7 +2541,13 @@ class ezyvet:
         except:
             self.logger.error("getTag -  something went wrong.", exc_info=True)
 
-    def getTagCategory(self, filter=None, maxpages=1):
+    def iterTag(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over tag(s) one record at a time as pages arrive.
+            Takes the same arguments as getTag().
+        """
+        return self.iterData("/tag", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getTagCategory(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get tag category(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#tagcategory
 
@@ -1549,8 +2556,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1559,7 +2570,7 @@ class ezyvet:
         """
         try:
             url = "/tagcategory"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1567,7 +2578,13 @@ class ezyvet:
         except:
             self.logger.error("getTagCategory -  something went wrong.", exc_info=True)
 
-    def getTherapeutic(self, filter=None, maxpages=1):
+    def iterTagCategory(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over tag category(s) one record at a time as pages arrive.
+            Takes the same arguments as getTagCategory().
+        """
+        return self.iterData("/tagcategory", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getTherapeutic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get therapeutic(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#therapeutic
 
@@ -1576,8 +2593,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1586,7 +2607,7 @@ class ezyvet:
         """
         try:
             url = "/therapeutic"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1594,6 +2615,12 @@ class ezyvet:
         except:
             self.logger.error("getTherapeutic -  something went wrong.", exc_info=True)
 
+    def iterTherapeutic(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over therapeutic(s) one record at a time as pages arrive.
+            Takes the same arguments as getTherapeutic().
+        """
+        return self.iterData("/therapeutic", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
     def getSystemSetting(self):
         """ Get systemsetting data.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#systemsetting
@@ -1616,7 +2643,13 @@ class ezyvet:
         except:
             self.logger.error("getSystemSetting -  something went wrong.", exc_info=True)
 
-    def getUser(self, filter=None, maxpages=1):
+    def iterSystemSetting(self):
+        """ Iterate over system settings one record at a time as pages arrive.
+            Takes the same arguments as getSystemSetting().
+        """
+        return self.iterData("/systemsetting")
+
+    def getUser(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get user(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#user
 
@@ -1625,8 +2658,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1635,7 +2672,7 @@ class ezyvet:
         """
         try:
             url = "/user"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1643,7 +2680,13 @@ class ezyvet:
         except:
             self.logger.error("getUser -  something went wrong.", exc_info=True)
 
-    def getVaccination(self, filter=None, maxpages=1):
+    def iterUser(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over user(s) one record at a time as pages arrive.
+            Takes the same arguments as getUser().
+        """
+        return self.iterData("/user", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
+    def getVaccination(self, filter=None, maxpages=1, fields=None, maxrecords=None):
         """ Get user(s) data given filters.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#vaccination
 
@@ -1652,8 +2695,12 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
+        fields : list, optional
+            The fields to keep in each record, e.g. ["id", "modified_at"].
+        maxrecords : int, optional
+            The maximum number of records to return, instead of maxpages.
 
         Returns
         -------
@@ -1662,7 +2709,7 @@ class ezyvet:
         """
         try:
             url = "/vaccination"
-            data = self.getData(url,filter=filter,maxpages=maxpages)
+            data = self.getData(url,filter=filter,maxpages=maxpages,fields=fields,maxrecords=maxrecords)
             self.logger.info("Returned " + str(len(data)) + " records.")
             return data
         except TypeError:
@@ -1670,6 +2717,12 @@ class ezyvet:
         except:
             self.logger.error("getVaccination -  something went wrong.", exc_info=True)
 
+    def iterVaccination(self, filter=None, maxpages=1, fields=None, maxrecords=None):
+        """ Iterate over vaccination(s) one record at a time as pages arrive.
+            Takes the same arguments as getVaccination().
+        """
+        return self.iterData("/vaccination", filter=filter, maxpages=maxpages, fields=fields, maxrecords=maxrecords)
+
     def getWebHookEvents(self, maxpages=1):
         """ Get wehooks(s) events list.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#webhookevents
@@ -1679,8 +2732,8 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
 
         Returns
         -------
@@ -1697,6 +2750,12 @@ class ezyvet:
         except:
             self.logger.error("getWebHookEvents -  something went wrong.", exc_info=True)
 
+    def iterWebHookEvents(self, maxpages=1):
+        """ Iterate over webhook events one record at a time as pages arrive.
+            Takes the same arguments as getWebHookEvents().
+        """
+        return self.iterData("/webhookevents", maxpages=maxpages)
+
     def getWebHooks(self, maxpages=1):
         """ Get webhooks(s) list.
             See: https://apisandbox.trial.ezyvet.com/api/docs/#webhooks
@@ -1706,8 +2765,8 @@ class ezyvet:
         filter : dictonary
             A dictionary of filter arguments to be used in the querystring.
         maxpages : int
-            The maximum number of pages to return. Each page has up to 10
-            records.
+            The maximum number of pages to return. Each page has up to
+            PAGE_SIZE records (200 by default).
 
         Returns
         -------
@@ -1724,9 +2783,17 @@ class ezyvet:
         except:
             self.logger.error("getWebHooks -  something went wrong.", exc_info=True)
 
+    def iterWebHooks(self, maxpages=1):
+        """ Iterate over webhooks one record at a time as pages arrive.
+            Takes the same arguments as getWebHooks().
+        """
+        return self.iterData("/webhooks", maxpages=maxpages)
+
     def lookupApptStatus(self, lookup):
         """ Lookup a status code or names.
-            This is a helper function and has no reference in the API.
+            This is a helper function and has no reference in the API. The
+            codes come from the reference registry, so they are fetched once
+            per process rather than on every lookup.
 
             Parameters
             ----------
@@ -1743,36 +2810,19 @@ class ezyvet:
         try:
             if lookup is None:
                 self.logger.error("You must suppily a name or id of code to look it up.")
-            name = id = None
+                return None
             try:
-                id = int(lookup)                 # let's see if it is a name or ID lookup by testing id
+                int(lookup)                     # let's see if it is a name or ID lookup by testing id
                 self.logger.debug("Looking up status code: " + str(lookup))
-                id = lookup
+                name = self.registry.nameOf("appointmentstatus", lookup)
+                if name is not None:
+                    return {"name": name}
             except ValueError:                  # Lookup by name not ID
                 self.logger.info("Looking up status string: " + str(lookup))
-                name = lookup
-
-            codes = self.getApptStatus()         # get a fresh list of codes TODO: This coud be chached
-            if codes is None:
-                self.logger.error("Could not retreive list of appointment status types.")
-                return None
-            self.logger.debug("Got codes: " + pformat(codes))
-
-            for s in codes:
-                self.logger.debug("Examining status " + s["appointmentstatus"]["name"] + " [" + str(s["appointmentstatus"]["id"] +"]"))
-                if name is not None:
-                    value = s["appointmentstatus"]["name"]
-                    key = name
-                    rvalue = s["appointmentstatus"]["id"]
-                else:
-                    value = s["appointmentstatus"]["id"]
-                    key = id
-                    rvalue = s["appointmentstatus"]["name"]
-                if key == value:
-                    if name is None:
-                        return {"name":rvalue}
-                    else:
-                        return {"id":rvalue}
+                id = self.registry.idOf("appointmentstatus", lookup)
+                if id is not None:
+                    return {"id": self.registry.get("appointmentstatus", id)["id"]}
+            return None
 
         except:
             self.logger.error("lookupApptStatus - something went wrong.", exc_info=True)
@@ -0,0 +1,120 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import logging
+import threading
+from concurrent.futures import Future
+
+class Loader:
+    """
+    Coalesces single record lookups for enrichment code. Lookups of the same
+    resource made within `window` seconds of each other are collected,
+    deduplicated and fetched together with ezyvet.fetchByIds(), and every
+    record is remembered for the life of the loader, so asking for the same
+    animal from a hundred appointments costs one lookup in one request.
+
+        loader = Loader(e)
+        for appt in appointments:
+            a = appt["appointment"]
+            pending.append((a, loader.load("/animal", a["animal_id"]),
+                               loader.load("/consult", a["consult_id"])))
+        for a, animal, consult in pending:
+            a["animal"] = animal.result()
+            ...
+
+    Use one loader per run; it never forgets a record.
+
+    Attributes
+    ----------
+    e : ezyvet
+        The client used to fetch the records
+    window : float, optional
+        Seconds to wait for more lookups before sending a batch
+    """
+
+    def __init__(self, e, window=0.01, logger=None):
+        self.e = e
+        self.window = window
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.futures = {}               # (resource, id) -> Future, the memo for this run
+        self.pending = {}               # resource -> ids waiting for the next batch
+        self.timers = {}                # resource -> Timer that sends the batch
+
+    def load(self, resource, id):
+        """ Ask for one record.
+
+            Returns
+            -------
+            concurrent.futures.Future
+                Resolves to the record (as getData returns it) or None if
+                it doesn't exist or could not be fetched.
+        """
+        if not resource.startswith("/"):
+            resource = "/" + resource
+        key = (resource, str(id))
+        with self.lock:
+            future = self.futures.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self.futures[key] = future
+            self.pending.setdefault(resource, []).append(id)
+            if resource not in self.timers:
+                timer = threading.Timer(self.window, self.dispatch, args=(resource,))
+                timer.daemon = True
+                self.timers[resource] = timer
+                timer.start()
+        return future
+
+    def loadMany(self, resource, ids):
+        """ Ask for several records, returns a list of futures in the same order. """
+        return [self.load(resource, id) for id in ids]
+
+    def flush(self):
+        """ Send every waiting batch now instead of at the end of its window. """
+        with self.lock:
+            resources = list(self.timers)
+            for resource in resources:
+                self.timers[resource].cancel()
+        for resource in resources:
+            self.dispatch(resource)
+
+    def dispatch(self, resource):
+        """ Fetch the waiting ids of a resource and resolve their futures. """
+        with self.lock:
+            ids = self.pending.pop(resource, [])
+            self.timers.pop(resource, None)
+        if not ids:
+            return
+        self.logger.debug("Loading " + str(len(ids)) + " " + resource + " records.")
+        try:                                                    # on a timer thread, nobody else would see the error
+            records = self.e.fetchByIds(resource, ids)          # None unless every chunk was fetched in full
+        except Exception:
+            self.logger.error("Loading " + resource + " records failed.", exc_info=True)
+            records = None
+        with self.lock:
+            for id in ids:
+                key = (resource, str(id))
+                future = self.futures[key]
+                if records is None:
+                    del self.futures[key]                       # only a complete batch is remembered, a later load tries again
+                    future.set_result(None)
+                else:
+                    future.set_result(records.get(str(id)))
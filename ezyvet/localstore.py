@@ -0,0 +1,239 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import json
+import logging
+import re
+import threading
+import time
+
+# Foreign keys that get their own indexed column, so joins such as
+# appointment -> animal -> contact can be answered locally.
+FOREIGN_KEYS = ("animal_id", "contact_id", "invoice_id", "consult_id")
+
+class LocalStore:
+    """
+    Local SQLite copy of ezyVet records. Each resource gets its own table
+    keyed by record id, holding the record's modified_at, when we fetched
+    it, typed and indexed foreign key columns (see FOREIGN_KEYS) and the
+    record itself as JSON. Records are upserted, so loading the same record
+    twice just keeps the newest copy. The store also keeps the modified_at
+    high-water mark of each sync so the next one only asks for changes.
+
+    Attributes
+    ----------
+    filename : string
+        Path of the SQLite database
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, filename, logger=None):
+        self.filename = filename
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.tables = set()
+        import sqlite3                                              # not loaded for callers that only want unwrap()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")                  # readers don't wait on a running sync
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                resource TEXT NOT NULL,
+                filter TEXT NOT NULL,
+                modified_at INTEGER,
+                synced_at INTEGER,
+                PRIMARY KEY (resource, filter)
+            )""")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def tableName(self, resource):
+        """ Table for a resource, e.g. "/animal" or "animal" -> animal. """
+        name = resource.strip("/").lower()
+        if not re.match(r"^[a-z]+$", name):
+            raise ValueError("Not a resource name: " + str(resource))
+        return name
+
+    def table(self, resource):
+        """ Create the table for a resource if it doesn't exist yet and
+            return its name.
+        """
+        name = self.tableName(resource)
+        if name not in self.tables:
+            with self.lock, self.db:
+                self.db.execute('CREATE TABLE IF NOT EXISTS "' + name + '" ('
+                                'id INTEGER PRIMARY KEY, '
+                                'modified_at INTEGER, '
+                                'data TEXT NOT NULL)')
+                columns = [row[1] for row in self.db.execute('PRAGMA table_info("' + name + '")')]
+                added = [c for c in ("fetched_at",) + FOREIGN_KEYS if c not in columns]
+                for column in added:                                # tables from before these columns existed
+                    self.db.execute('ALTER TABLE "' + name + '" ADD COLUMN ' + column + ' INTEGER')
+                for column in FOREIGN_KEYS:
+                    self.db.execute('CREATE INDEX IF NOT EXISTS "' + name + '_' + column + '" ON "' + name + '" (' + column + ')')
+                if added:
+                    self.backfill(name)
+            self.tables.add(name)
+        return name
+
+    def backfill(self, name):
+        """ Fill the foreign key columns of rows stored before they existed. """
+        rows = []
+        for id, data in self.db.execute('SELECT id, data FROM "' + name + '"').fetchall():
+            fields = unwrap(name, json.loads(data))
+            rows.append(tuple(toInt(fields.get(k)) for k in FOREIGN_KEYS) + (id,))
+        self.db.executemany('UPDATE "' + name + '" SET ' + ', '.join(k + ' = ?' for k in FOREIGN_KEYS) + ' WHERE id = ?', rows)
+
+    def upsert(self, resource, records):
+        """ Insert or replace records as they come from the API (the
+            {"animal": {...}} envelope). All of them are written in one
+            transaction.
+
+            Returns
+            -------
+            int or None
+                The highest modified_at among the records.
+        """
+        name = self.table(resource)
+        now = int(time.time())
+        newest = None
+        rows = []
+        for record in records:
+            fields = unwrap(name, record)
+            modified = toInt(fields.get("modified_at"))
+            if modified is not None and (newest is None or modified > newest):
+                newest = modified
+            rows.append((toInt(fields["id"]), modified, now) + tuple(toInt(fields.get(k)) for k in FOREIGN_KEYS) + (json.dumps(record),))
+        columns = ("id", "modified_at", "fetched_at") + FOREIGN_KEYS + ("data",)
+        with self.lock, self.db:
+            self.db.executemany('INSERT OR REPLACE INTO "' + name + '" (' + ', '.join(columns) + ') '
+                                'VALUES (' + ', '.join('?' for c in columns) + ')', rows)
+        return newest
+
+    def get(self, resource, id):
+        """ Return the stored record with this id, or None. """
+        name = self.table(resource)
+        with self.lock:
+            row = self.db.execute('SELECT data FROM "' + name + '" WHERE id = ?', (toInt(id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self, resource):
+        """ Yield every stored record of a resource in id order. """
+        name = self.table(resource)
+        with self.lock:
+            rows = self.db.execute('SELECT data FROM "' + name + '" ORDER BY id').fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def select(self, resource, where=None, since=None):
+        """ Return stored records matching column values, in id order.
+            Parameters
+            ----------
+            resource : string
+                The resource, e.g. "/animal"
+            where : dictonary, optional
+                Column (id or one of FOREIGN_KEYS) to value. A list value, or
+                {"in": [...]} like the API takes, matches any of its values.
+            since : int, optional
+                Only records fetched at or after this unix time.
+
+            Returns
+            -------
+            array
+                The records as they came from the API.
+        """
+        name = self.table(resource)
+        clauses = []
+        args = []
+        for column, value in (where or {}).items():
+            if column not in ("id",) + FOREIGN_KEYS:
+                raise ValueError("Can't select " + name + " by " + str(column))
+            if isinstance(value, dict) and list(value) == ["in"]:
+                value = value["in"]
+            if isinstance(value, (list, tuple, set)):
+                values = [toInt(v) for v in value]
+                clauses.append(column + ' IN (' + ', '.join('?' for v in values) + ')')
+                args.extend(values)
+            else:
+                clauses.append(column + ' = ?')
+                args.append(toInt(value))
+        if since is not None:
+            clauses.append('fetched_at >= ?')
+            args.append(since)
+        sql = 'SELECT data FROM "' + name + '"'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        with self.lock:
+            rows = self.db.execute(sql + ' ORDER BY id', args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def syncedAt(self, resource, filter=None):
+        """ When this resource and filter last finished a sync, or None. """
+        with self.lock:
+            row = self.db.execute("SELECT synced_at FROM watermarks WHERE resource = ? AND filter = ?",
+                                  (self.tableName(resource), filterKey(filter))).fetchone()
+        return row[0] if row else None
+
+    def watermark(self, resource, filter=None):
+        """ The highest modified_at seen by the last complete sync of this
+            resource and filter, or None if it has never been synced.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT modified_at FROM watermarks WHERE resource = ? AND filter = ?",
+                                  (self.tableName(resource), filterKey(filter))).fetchone()
+        return row[0] if row else None
+
+    def setWatermark(self, resource, filter, modified_at):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO watermarks (resource, filter, modified_at, synced_at) VALUES (?, ?, ?, ?)",
+                            (self.tableName(resource), filterKey(filter), modified_at, int(time.time())))
+
+
+def unwrap(name, record):
+    """ The fields of a record, taking off the {"animal": {...}} envelope. """
+    if name in record:
+        return record[name]
+    if len(record) == 1:
+        fields = next(iter(record.values()))
+        if isinstance(fields, dict):
+            return fields
+    return record
+
+
+def project(name, item, fields):
+    """ A record with only the given fields, keeping its {"animal": {...}} envelope. """
+    record = unwrap(name, item)
+    kept = {field: record[field] for field in fields if field in record}
+    if record is item:                                  # no envelope
+        return kept
+    return {name if name in item else next(iter(item)): kept}
+
+
+def filterKey(filter):
+    """ The same filter always gives the same key. """
+    return json.dumps(filter or {}, sort_keys=True)
+
+
+def toInt(value):
+    """ ezyVet sends ids and times as numbers or numeric strings. """
+    if value is None or value == "":
+        return None
+    return int(float(value))
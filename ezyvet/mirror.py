@@ -0,0 +1,107 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import logging
+import time
+try:
+    from ezyvet.localstore import FOREIGN_KEYS
+    from ezyvet.sync import Sync
+except ImportError:
+    from .localstore import FOREIGN_KEYS
+    from .sync import Sync
+
+class Mirror:
+    """
+    Local SQLite mirror the ezyvet class reads through. Every page the
+    client fetches is stored, and reads are answered from the mirror when
+    it is fresher than `maxage` seconds:
+
+    - an id lookup ({"id": 5} or {"id": [5, 6]}) when every record asked for
+      was fetched within maxage
+    - no filter, or equality filters on id and the indexed foreign keys
+      (see FOREIGN_KEYS), when the whole resource was synced within maxage
+      by refresh()
+
+    Anything else goes to the API as usual. Turn it on with the USE_MIRROR
+    setting.
+
+    Attributes
+    ----------
+    e : ezyvet
+        The client the mirror belongs to, used by refresh()
+    store : LocalStore
+        Where the records are kept
+    maxage : int
+        Seconds a mirrored record or resource counts as fresh
+    """
+
+    def __init__(self, e, store, maxage=3600, logger=None):
+        self.e = e
+        self.store = store
+        self.maxage = maxage
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+
+    def refresh(self, resource):
+        """ Bring the whole resource up to date with an incremental sync, so
+            filtered reads of it can be answered locally.
+
+            Returns
+            -------
+            int or None
+                Records synced or None for failure, see Sync.run().
+        """
+        return Sync(self.e, self.store, self.logger).run(resource)
+
+    def isFresh(self, resource):
+        synced = self.store.syncedAt(resource)
+        return synced is not None and synced >= time.time() - self.maxage
+
+    def lookup(self, resource, filter=None):
+        """ Answer a read from the mirror.
+
+            Returns
+            -------
+            array or None
+                The records or None if the mirror can't answer this read.
+        """
+        try:
+            since = int(time.time() - self.maxage)
+            filter = filter or {}
+            if any(k not in ("id",) + FOREIGN_KEYS for k in filter):
+                return None
+            if list(filter) == ["id"]:
+                ids = filter["id"]
+                if isinstance(ids, dict) and list(ids) == ["in"]:
+                    ids = ids["in"]
+                if not isinstance(ids, (list, tuple, set)):
+                    ids = [ids]
+                records = self.store.select(resource, filter, since=since)
+                if len(records) == len(set(str(i) for i in ids)):
+                    self.logger.info("Answered " + resource + " id lookup from the mirror.")
+                    return records
+            if self.isFresh(resource):
+                self.logger.info("Answered " + resource + " from the mirror.")
+                return self.store.select(resource, filter)
+            return None
+        except (TypeError, ValueError):                       # not a filter the mirror understands
+            return None
+
+    def save(self, resource, items):
+        """ Store a page the client fetched. """
+        self.store.upsert(resource, items)
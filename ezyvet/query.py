@@ -0,0 +1,147 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import json
+from urllib.parse import urlencode, parse_qsl
+
+MAX_LIMIT = 200                                     # the most records the API returns per page
+
+# Comparison operators written as symbols, and the names the ezyVet API
+# expects for them in a filter like created_at={"gt":1540000000}.
+OPERATORS = {
+    ">": "gt",
+    ">=": "gte",
+    "<": "lt",
+    "<=": "lte",
+    "=": "eq",
+    "==": "eq",
+    "!=": "neq",
+}
+
+class Query:
+    """
+    A request for an endpoint: the path plus its filter. The filter is
+    encoded the way the API expects, nested operators as compact JSON
+    (created_at={"gt":1540000000}, id={"in":[1,2]}), and the querystring is
+    sorted so the same filter always gives the same URL. Page URLs are built
+    from scratch for each page.
+
+        q = Query("/invoice", {"contact_id": 12}).where("created_at", ">=", 1540000000)
+        q.url(2)    # '/invoice?contact_id=12&created_at=%7B%22gte%22%3A1540000000%7D&page=2'
+        q.key()     # the same without the page, for caches and dedup
+
+    Attributes
+    ----------
+    path : string
+        The API endpoint, e.g. "/invoice"
+    filter : dictonary
+        Field to value. A value can be a plain value, a list (any of), or a
+        dictionary of operators to values like {">=": 1, "<": 10}.
+    limit : int
+        Records per page, None for the API default
+    """
+
+    def __init__(self, path, filter=None, limit=None):
+        self.path = path
+        self.filter = dict(filter or {})
+        self.limit = limit
+
+    @classmethod
+    def fromUrl(cls, url):
+        """ A Query for a URL that already has a querystring, any page
+            parameter is dropped. Values are kept as the strings they were
+            sent as, so url() gives back the same querystring; a value like
+            name=[1] is not read as a list. """
+        path, _, qs = url.partition("?")
+        filter = {}
+        limit = None
+        for field, value in parse_qsl(qs, keep_blank_values=True):
+            if field == "page":
+                continue
+            if field == "limit":
+                limit = int(value)
+                continue
+            filter[field] = value
+        return cls(path, filter, limit)
+
+    def where(self, field, op, value=None):
+        """ Add a condition, where("id", 5) or where("created_at", ">", 123).
+            Conditions on the same field are combined. Returns the query.
+            Raises ValueError for where("id", None), the API has no null. """
+        if value is None:
+            if op is None:
+                raise ValueError("No value given for " + str(field) + ", the API can't filter on None.")
+            self.filter[field] = op
+            return self
+        current = self.filter.get(field)
+        condition = dict(current) if isinstance(current, dict) else {}
+        condition[OPERATORS.get(op, op)] = value
+        self.filter[field] = condition
+        return self
+
+    def params(self):
+        """ The (field, encoded value) pairs and the limit, sorted by field. """
+        params = [(field, encodeValue(value)) for field, value in self.filter.items()]
+        if self.limit is not None:
+            params.append(("limit", str(self.limit)))
+        return sorted(params)
+
+    def querystring(self, page=None):
+        params = self.params()
+        if page is not None and page > 1:
+            params = sorted(params + [("page", str(page))])
+        return urlencode(params)
+
+    def url(self, page=None):
+        """ The path and querystring for a page, built fresh every time. """
+        qs = self.querystring(page)
+        return self.path + "?" + qs if qs else self.path
+
+    def key(self):
+        """ A stable key for the query whatever order the filter was given in. """
+        return self.url()
+
+    def __str__(self):
+        return self.url()
+
+    def __repr__(self):
+        return "Query(" + repr(self.path) + ", " + repr(self.filter) + ", " + repr(self.limit) + ")"
+
+def encodeValue(value):
+    """ A filter value as the API expects it in the querystring. Raises
+        ValueError for None rather than sending the text "None". """
+    if value is None:
+        raise ValueError("A filter value can't be None.")
+    if isinstance(value, dict):
+        return json.dumps({OPERATORS.get(op, op): v for op, v in value.items()}, separators=(",", ":"), sort_keys=True)
+    if isinstance(value, (list, tuple, set)):
+        return json.dumps({"in": list(value)}, separators=(",", ":"))
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def pageSize(size=MAX_LIMIT, maxrecords=None):
+    """ Records to ask for per page: size (at most MAX_LIMIT), or fewer when
+        that is all the caller wants. None leaves it to the API (10 records). """
+    if not size:
+        return None
+    size = min(int(size), MAX_LIMIT)
+    if maxrecords is not None:
+        size = max(1, min(size, int(maxrecords)))
+    return size
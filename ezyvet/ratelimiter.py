@@ -0,0 +1,154 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+try:
+    import fcntl                        # POSIX only, without it the limit is per process
+except ImportError:
+    fcntl = None
+
+class RateLimiter:
+    """
+    Token bucket that keeps the requests made from this host under the
+    ezyVet per-partner limit. The bucket is kept in a state file so every
+    thread and every process using the same HOME_DIR draws from the same
+    budget; the file is locked while it is updated.
+
+    Attributes
+    ----------
+    rate : float
+        Requests per minute allowed
+    burst : int
+        Requests that can be made back to back before the rate applies
+    filename : string, optional
+        Where the shared bucket is kept. Without one the bucket is only
+        shared by the threads of this process.
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, rate, burst=10, filename=None, logger=None):
+        self.rate = float(rate) / 60.0                  # tokens per second
+        self.burst = max(1, int(burst))
+        self.filename = filename
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.state = {"tokens": self.burst, "updated": time.time(), "paused_until": 0}
+
+    def acquire(self):
+        """ Block until a request may be made. """
+        while True:
+            wait = self.take()
+            if wait <= 0:
+                return
+            self.logger.debug("Rate limit reached, waiting " + str(round(wait, 3)) + " seconds.")
+            time.sleep(wait)
+
+    def take(self):
+        """ Try to take a token from the bucket.
+
+            Returns
+            -------
+            float
+                0 if a token was taken, otherwise the seconds to wait before
+                trying again.
+        """
+        return self.update(self.takeToken)
+
+    def pause(self, seconds):
+        """ Stop everyone sharing the bucket from making requests for a
+            while, e.g. when the API answers 429 with a Retry-After.
+        """
+        def hold(state, now):
+            state["paused_until"] = max(state["paused_until"], now + seconds)
+            state["tokens"] = 0
+            state["updated"] = state["paused_until"]      # refill from the end of the pause, not across it
+            return 0
+        self.update(hold)
+
+    def takeToken(self, state, now):
+        if now < state["paused_until"]:
+            return state["paused_until"] - now
+        state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * self.rate)
+        state["updated"] = now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0
+        return (1 - state["tokens"]) / self.rate
+
+    def update(self, change):
+        """ Apply `change(state, now)` to the bucket while holding the thread
+            lock and, if there is a state file, an exclusive lock on it.
+        """
+        with self.lock:
+            if self.filename is None or fcntl is None:
+                return change(self.state, time.time())
+            fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                with os.fdopen(os.dup(fd), "r+") as f:
+                    try:
+                        state = json.load(f)
+                    except ValueError:                  # new or damaged file, start full
+                        state = dict(self.state)
+                    result = change(state, time.time())
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+def retryAfter(value):
+    """ Parse a Retry-After header (seconds or an HTTP date).
+
+        Returns
+        -------
+        float or None
+            Seconds to wait or None if the header is missing or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoffDelay(attempt, retry_after=None, base=1.0, cap=60.0):
+    """ Seconds to wait before retry number `attempt` (starting at 1).
+        The server's Retry-After wins when it sent one, otherwise exponential
+        backoff with full jitter so workers that failed together don't all
+        retry together.
+    """
+    if retry_after is not None:
+        return min(cap, retry_after) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
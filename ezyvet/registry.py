@@ -0,0 +1,130 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import logging
+import threading
+import time
+
+# Small lookup tables the registry knows how to load, by the name used to
+# ask for them, mapped to their endpoint.
+REFERENCE_TABLES = {
+    "appointmentstatus": "/appointmentstatus",
+    "appointmenttype": "/appointmenttype",
+    "contactdetailtype": "/contactdetailtype",
+    "sex": "/sex",
+    "species": "/species",
+    "breed": "/breed",
+    "country": "/country",
+    "paymentmethod": "/paymentmethods",
+    "tagcategory": "/tagcategory",
+}
+
+# Loaded tables, shared by every registry in the process:
+# (api url, table) -> (loaded at, id -> record, name -> id, lowercase name -> id)
+TABLES = {}
+TABLES_LOCK = threading.Lock()
+
+class ReferenceRegistry:
+    """
+    Reference data (appointment statuses, species, countries, ...) loaded
+    once per process and indexed by id and by name, so turning a status
+    name into an id costs a dictionary lookup instead of an API call. Tables
+    are loaded the first time they are used and reloaded after `refresh`
+    seconds.
+
+        e.registry.idOf("appointmentstatus", "In Hospital")      # -> "9"
+        e.registry.nameOf("species", 1)                          # -> "Canine"
+
+    Attributes
+    ----------
+    e : ezyvet
+        The client used to load the tables
+    refresh : int, optional
+        Seconds before a loaded table is fetched again
+    """
+
+    def __init__(self, e, refresh=3600, logger=None):
+        self.e = e
+        self.refresh = refresh
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+
+    def table(self, name):
+        """ Return the (id -> record, name -> id, lowercase name -> id)
+            indexes of a table, loading it if needed.
+
+            Returns
+            -------
+            tuple or None
+                The indexes or None if the table could not be loaded.
+        """
+        if name not in REFERENCE_TABLES:
+            raise KeyError("Unknown reference table: " + str(name))
+        key = (self.e.url, name)
+        loaded = TABLES.get(key)
+        if loaded is not None and loaded[0] + self.refresh > time.time():
+            return loaded[1:]
+        with TABLES_LOCK:
+            loaded = TABLES.get(key)                            # another thread may have loaded it while we waited
+            if loaded is not None and loaded[0] + self.refresh > time.time():
+                return loaded[1:]
+            self.logger.info("Loading reference table " + name)
+            items = self.e.getData(REFERENCE_TABLES[name], maxpages=None)
+            if items is None:
+                self.logger.error("Could not load reference table " + name)
+                return loaded[1:] if loaded is not None else None   # stale beats nothing
+            byId = {}
+            byName = {}
+            byLowerName = {}
+            for item in items:
+                record = item[name] if name in item else next(iter(item.values()))
+                id = str(record["id"])
+                byId[id] = record
+                if record.get("name") is not None:
+                    byName.setdefault(record["name"], id)
+                    byLowerName.setdefault(str(record["name"]).lower(), id)
+            TABLES[key] = (time.time(), byId, byName, byLowerName)
+            return byId, byName, byLowerName
+
+    def get(self, name, id):
+        """ The record of a table with this id, or None. """
+        indexes = self.table(name)
+        return indexes[0].get(str(id)) if indexes else None
+
+    def idOf(self, name, value):
+        """ The id of the record with this name (exact match first, then
+            ignoring case), or None.
+        """
+        indexes = self.table(name)
+        if not indexes:
+            return None
+        if value in indexes[1]:
+            return indexes[1][value]
+        return indexes[2].get(str(value).lower())
+
+    def nameOf(self, name, id):
+        """ The name of the record with this id, or None. """
+        record = self.get(name, id)
+        return record.get("name") if record else None
+
+    def invalidate(self, name=None):
+        """ Forget a loaded table (or all of them) so it is fetched again. """
+        with TABLES_LOCK:
+            for key in list(TABLES):
+                if key[0] == self.e.url and (name is None or key[1] == name):
+                    del TABLES[key]
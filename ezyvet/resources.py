@@ -0,0 +1,125 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+""" The API endpoints the library covers. Each entry maps the name used in
+    the client method names (getX / iterX) to the endpoint path, the arguments
+    the methods take ("filter" for filter and maxpages, "max" for maxpages
+    only, "none" for neither) and the default maximum number of pages.
+"""
+
+ENDPOINTS = {
+    "Address": ("/address", "filter", 1),
+    "Animal": ("/animal", "filter", 1),
+    "AnimalColor": ("/animalcolor", "filter", 1),
+    "Appointment": ("/appointment", "filter", 1),
+    "ApptStatus": ("/appointmentstatus", "none", 10),
+    "ApptType": ("/appointmenttype", "none", 10),
+    "Assessment": ("/assessment", "filter", 1),
+    "Attachment": ("/attachment", "filter", 1),
+    "Breed": ("/breed", "filter", 1),
+    "Communication": ("/communication", "filter", 1),
+    "Consult": ("/consult", "filter", 1),
+    "Contact": ("/contact", "filter", 1),
+    "ContactDetail": ("/contactdetail", "filter", 1),
+    "ContactDetailType": ("/contactdetailtype", "none", 10),
+    "Country": ("/country", "filter", 1),
+    "Diagnostic": ("/diagnostic", "filter", 1),
+    "DiagnosticResult": ("/diagnosticresult", "filter", 1),
+    "DiagnosticResultItem": ("/diagnosticresultitem", "filter", 1),
+    "DiagnosticRequest": ("/diagnosticrequest", "filter", 1),
+    "DiagnosticRequstItem": ("/diagnosticrequestitem", "filter", 1),
+    "File": ("/file", "filter", 1),
+    "IntegratedDiagnostic": ("/integrateddiagnostic", "filter", 1),
+    "HealthStatus": ("/healthstatus", "filter", 1),
+    "History": ("/history", "filter", 1),
+    "Invoice": ("/invoice", "filter", 1),
+    "InvoiceLine": ("/invoiceline", "filter", 1),
+    "Operation": ("/operation", "filter", 1),
+    "Payment": ("/payment", "filter", 1),
+    "PaymentMethod": ("/paymentmethods", "filter", 1),
+    "PhysicalExam": ("/physicalexam", "filter", 1),
+    "Plan": ("/plan", "filter", 1),
+    "Prescription": ("/prescription", "filter", 1),
+    "PrescriptionItem": ("/prescriptionitem", "filter", 1),
+    "PresentingProblem": ("/presentingproblem", "filter", 1),
+    "PresentingProblemLink": ("/presentingproblemlink", "filter", 1),
+    "Product": ("/product", "filter", 1),
+    "ProductGroup": ("/productgroup", "filter", 1),
+    "PurchaseOrder": ("/purchaseorder", "filter", 1),
+    "PurchaseOrderItem": ("/purchaseorderitem", "filter", 1),
+    "ReceiveInvoice": ("/receiveinvoice", "filter", 1),
+    "ReceiveInvoiceItem": ("/receiveinvoiceitem", "filter", 1),
+    "Resource": ("/resource", "filter", 1),
+    "Separation": ("/separation", "filter", 1),
+    "Sex": ("/sex", "filter", 1),
+    "Species": ("/species", "filter", 1),
+    "Tag": ("/tag", "filter", 1),
+    "TagCategory": ("/tagcategory", "filter", 1),
+    "Therapeutic": ("/therapeutic", "filter", 1),
+    "SystemSetting": ("/systemsetting", "none", 1),
+    "User": ("/user", "filter", 1),
+    "Vaccination": ("/vaccination", "filter", 1),
+    "WebHookEvents": ("/webhookevents", "max", 1),
+    "WebHooks": ("/webhooks", "max", 1),
+}
+
+""" Relationships getX(expand=[...]) can resolve. For each resource, the
+    relationship name maps to the related endpoint, the key that links them
+    and the kind: "one" when the key is a field of this record holding the
+    related record's id, "many" when the key is a field of the related
+    records holding this record's id.
+"""
+
+RELATIONSHIPS = {
+    "/appointment": {
+        "animal": ("/animal", "animal_id", "one"),
+        "consult": ("/consult", "consult_id", "one"),
+        "contact": ("/contact", "contact_id", "one"),
+    },
+    "/consult": {
+        "animal": ("/animal", "animal_id", "one"),
+        "assessments": ("/assessment", "consult_id", "many"),
+        "diagnosticrequests": ("/diagnosticrequest", "consult_id", "many"),
+        "histories": ("/history", "consult_id", "many"),
+        "physicalexams": ("/physicalexam", "consult_id", "many"),
+        "plans": ("/plan", "consult_id", "many"),
+        "presentingproblemlinks": ("/presentingproblemlink", "consult_id", "many"),
+        "prescriptions": ("/prescription", "consult_id", "many"),
+    },
+    "/invoice": {
+        "consult": ("/consult", "consult_id", "one"),
+        "contact": ("/contact", "contact_id", "one"),
+        "lines": ("/invoiceline", "invoice_id", "many"),
+    },
+}
+
+""" Leading CSV columns for each resource, in order. Any other field seen on
+    the first page follows these, so the header is the same from run to run
+    for the fields that matter. CSV exports of resources not listed here
+    need their columns picked (--columns).
+"""
+
+BASE_COLUMNS = ["id", "active", "created_at", "modified_at"]
+
+COLUMNS = {
+    "/animal": BASE_COLUMNS + ["name", "contact_id", "species_id", "breed_id", "sex_id", "date_of_birth"],
+    "/appointment": BASE_COLUMNS + ["start_time", "duration", "status_id", "type_id", "animal_id", "contact_id", "consult_id"],
+    "/consult": BASE_COLUMNS + ["date", "animal_id", "contact_id"],
+    "/contact": BASE_COLUMNS + ["code", "first_name", "last_name", "business_name", "is_business"],
+    "/invoice": BASE_COLUMNS + ["invoice_number", "date", "contact_id", "consult_id", "status"],
+    "/invoiceline": BASE_COLUMNS + ["invoice_id", "product_id", "quantity"],
+    "/payment": BASE_COLUMNS + ["date", "contact_id", "payment_method_id", "amount"],
+}
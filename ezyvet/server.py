@@ -0,0 +1,311 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import hmac
+import http.client
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+try:
+    from ezyvet.query import pageSize, MAX_LIMIT
+    from ezyvet.resources import ENDPOINTS
+    from ezyvet.registry import REFERENCE_TABLES
+except ImportError:
+    from .query import pageSize, MAX_LIMIT
+    from .resources import ENDPOINTS
+    from .registry import REFERENCE_TABLES
+
+class QueryServer:
+    """
+    Keep one warm client (token, pooled session, caches and reference
+    tables) and answer queries for it over a Unix socket or a localhost
+    HTTP port, so short lived callers skip the interpreter, imports, token
+    check and handshakes. A query is the JSON body of POST /query, the same
+    shape as a --batch line:
+
+        {"resource": "appointmentstatus"}
+        {"resource": "invoice", "filter": {"contact_id": 12}, "max": 500}
+
+    The answer is {"items": [...]} or {"error": "..."}. Reference tables
+    are answered from the client's in-memory registry, cut to the records
+    the same query would get from the API.
+
+        QueryServer(e, "unix:/home/user/.ezyvetcli/ezyvet.sock").run()
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance that answers the queries
+    address : string
+        "unix:<path>" for a Unix socket (only the owner can connect), or
+        "<host>:<port>" with a loopback host. Any local user can connect to
+        a port, so there every request must carry the shared secret from
+        HOME_DIR/server.key (see serverKey()) as "Authorization: Bearer <key>".
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, e, address, logger=None):
+        self.e = e
+        self.address = address
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+        self.httpd = None
+        self.key = None                                                         # required from clients when set
+
+    def query(self, query):
+        """ Answer one query, see runQuery(). """
+        name, url, kind, maxpages = resolve(query.get("resource"))
+        filter = query.get("filter") or {}
+        table = next((t for t, path in REFERENCE_TABLES.items() if path == url), None)
+        if table is not None and set(filter) <= {"id"} and not query.get("expand"):
+            indexes = self.e.registry.table(table)                             # in memory, no request at all
+            if indexes is not None:
+                records = indexes[0].values() if not filter else [r for r in [indexes[0].get(str(filter["id"]))] if r]
+                items = [{table: record} for record in records]
+                if kind == "none" or query.get("max") is None:                 # as many as runQuery() would fetch
+                    limit = maxpages * (pageSize(self.e.settings.get("PAGE_SIZE", MAX_LIMIT)) or 10) if maxpages else None
+                else:
+                    limit = int(query["max"])
+                return self.e.project(url, items[:limit], query.get("fields"))
+        return runQuery(self.e, query)
+
+    def bind(self):
+        """ Create the listening server for self.address. """
+        handler = type("Handler", (QueryHandler,), {"service": self})
+        if self.address.startswith("unix:"):
+            path = self.address[5:]
+            if os.path.exists(path):
+                stale(path)
+            umask = os.umask(0o077)                                             # the socket is as private as the token
+            try:
+                self.httpd = UnixHTTPServer(path, handler)
+            finally:
+                os.umask(umask)
+        else:
+            host, port = splitAddress(self.address)
+            if host not in ("127.0.0.1", "::1", "localhost"):
+                raise ValueError("The query server only listens on localhost, not " + host)
+            self.key = serverKey(self.e.home_dir, create=True)
+            self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        return self.httpd
+
+    def run(self):
+        """ Serve until interrupted, then clean up the socket. """
+        if self.httpd is None:
+            self.bind()
+        self.logger.info("Answering queries on " + self.address)
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self.httpd is not None:
+            self.httpd.server_close()
+            if self.address.startswith("unix:") and os.path.exists(self.address[5:]):
+                os.remove(self.address[5:])
+            self.httpd = None
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"           # keep-alive for clients that send several queries
+    service = None
+
+    def address_string(self):
+        return str(self.client_address) if self.client_address else "unix socket"
+
+    def log_message(self, format, *args):
+        self.service.logger.debug("QueryServer: " + (format % args))
+
+    def sendJson(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorized(self):
+        """ True if the request may be answered, sending a 401 if not. """
+        key = self.service.key
+        if key is None:                                                         # Unix socket, the file mode keeps others out
+            return True
+        if hmac.compare_digest(self.headers.get("Authorization", ""), "Bearer " + key):
+            return True
+        self.sendJson({"error": "Unauthorized"}, 401)
+        return False
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path == "/health":
+            self.sendJson({"ok": True})
+        else:
+            self.sendJson({"error": "Not found"}, 404)
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path != "/query":
+            self.sendJson({"error": "Not found"}, 404)
+            return
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.sendJson({"items": self.service.query(query)})
+        except (ValueError, KeyError, TypeError) as err:
+            self.sendJson({"error": str(err)}, 400)
+        except Exception as err:
+            self.service.logger.error("QueryServer - query failed.", exc_info=True)
+            self.sendJson({"error": str(err)}, 502)
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ http.server on a Unix socket. """
+    daemon_threads = True
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """ http.client over a Unix socket. """
+
+    def __init__(self, path, timeout=60):
+        http.client.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+def stale(path):
+    """ Remove the socket file at path if it was left over from a server
+        that died. Raises OSError if a server is still listening on it, or
+        if it can't be told to be a dead socket.
+    """
+    if not stat.S_ISSOCK(os.stat(path).st_mode):
+        raise OSError(path + " is in the way and is not a socket.")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(1)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:                                              # nobody is listening
+        os.remove(path)
+        return
+    except OSError as err:
+        raise OSError("Can't tell whether a server is listening on " + path + ": " + str(err))
+    finally:
+        probe.close()
+    raise OSError("A server is already listening on " + path + ".")
+
+def connect(address, timeout):
+    if address.startswith("unix:"):
+        return UnixHTTPConnection(address[5:], timeout)
+    host, port = splitAddress(address)
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+def headers(key):
+    return {"Authorization": "Bearer " + key} if key else {}
+
+def ask(address, query, timeout=300, key=None):
+    """ Send a query to a running QueryServer and return its records. key
+        is the shared secret a server on a port asks for, see serverKey().
+        Raises ConnectionError when the server can't be reached and IOError
+        when the query failed.
+    """
+    conn = connect(address, timeout)
+    try:
+        conn.request("POST", "/query", json.dumps(query), dict(headers(key), **{"Content-Type": "application/json"}))
+        answer = json.loads(conn.getresponse().read())
+    except (OSError, http.client.HTTPException) as err:
+        raise ConnectionError("Can't reach the query server at " + address + ": " + str(err))
+    finally:
+        conn.close()
+    if "error" in answer:
+        raise IOError(answer["error"])
+    return answer["items"]
+
+def ping(address, timeout=1, key=None):
+    """ True if a QueryServer is answering at address and accepts key. """
+    conn = connect(address, timeout)
+    try:
+        conn.request("GET", "/health", headers=headers(key))
+        r = conn.getresponse()
+        r.read()
+        return r.status == 200
+    except (OSError, http.client.HTTPException, ValueError):
+        return False
+    finally:
+        conn.close()
+
+def serverKey(home_dir, create=False):
+    """ The shared secret for a query server on a port, kept in
+        HOME_DIR/server.key where only the owner can read it. With create a
+        new one is made when there isn't one. None if there is no key.
+    """
+    filename = os.path.join(home_dir, "server.key")
+    if create and not os.path.exists(filename):
+        os.makedirs(home_dir, exist_ok=True)
+        try:
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+        except FileExistsError:                                                 # another server made it first
+            pass
+    try:
+        with open(filename) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def resolve(resource):
+    """ (name, url, kind, maxpages) for a resource given by library name
+        ("InvoiceLine") or path ("invoiceline", "/invoiceline"). """
+    wanted = str(resource or "").strip("-/").lower()
+    for name, (url, kind, maxpages) in ENDPOINTS.items():
+        if wanted in (name.lower(), url.strip("/").lower()):
+            return name, url, kind, maxpages
+    raise ValueError("Unknown resource: " + str(resource))
+
+def runQuery(e, query, max=None, fields=None):
+    """ Run a query dictionary ({"resource", "filter", "max", "fields",
+        "expand"}) with a client and return its records. max and fields are
+        the defaults for queries that don't give their own.
+    """
+    name, url, kind, maxpages = resolve(query.get("resource"))
+    max = query.get("max", max)
+    fields = query.get("fields", fields)
+    expand = query.get("expand")
+    items = e.getData(url, filter=query.get("filter") if kind == "filter" else None,
+                      maxpages=maxpages if kind == "none" or max is None else None,
+                      maxrecords=max if kind != "none" else None, workers=1,
+                      fields=e.expandFields(url, fields, expand))
+    if items is None:
+        raise IOError("The request for " + url + " failed.")
+    if expand and e.expand(url, items, expand) is None:
+        raise IOError("Fetching the records related to " + url + " failed.")
+    return items
+
+def splitAddress(address):
+    """ "127.0.0.1:8765" or "http://localhost:8765" -> (host, port) """
+    host, _, port = address.split("://", 1)[-1].rstrip("/").rpartition(":")
+    return host.strip("[]") or "127.0.0.1", int(port)
@@ -0,0 +1,101 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import logging
+
+class Sync:
+    """
+    Incremental sync of ezyVet resources into a LocalStore. Each sync only
+    asks the API for records whose modified_at is at or after the high-water
+    mark of the last complete sync of the same resource and filter, and
+    upserts them. The first sync of a resource fetches everything.
+
+        store = LocalStore(e.home_dir + "ezyvet.sqlite3")
+        Sync(e, store).run("/animal")
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance used to fetch the pages
+    store : LocalStore
+        Where the records and watermarks are kept
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, e, store, logger=None):
+        self.e = e
+        self.store = store
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+
+    def run(self, resource, filter=None, maxpages=None, workers=None):
+        """ Sync one resource.
+            Parameters
+            ----------
+            resource : string
+                The API endpoint, e.g. "/animal"
+            filter : dictonary, optional
+                Extra filter arguments. Each filter keeps its own watermark.
+            maxpages : int, optional
+                The maximum number of pages to fetch, None for all of them.
+                The watermark only moves on after an uncapped sync.
+            workers : int, optional
+                Pages fetched at the same time, see ezyvet.getData().
+
+            Returns
+            -------
+            int or None
+                The number of records upserted or None if the sync failed. A
+                failed sync leaves the watermark alone, so the next run picks
+                up everything this one missed.
+        """
+        try:
+            mark = self.store.watermark(resource, filter)
+            query = dict(filter or {})
+            if mark is not None:
+                # >= rather than > so records changed in the same second as the
+                # last sync aren't missed, upserting them again is harmless.
+                query["modified_at"] = {"gte": mark}
+                self.logger.info("Syncing " + resource + " changes since " + str(mark))
+            else:
+                self.logger.info("First sync of " + resource + ", fetching everything.")
+
+            count = 0
+            newest = mark
+            for page, pages, items in self.e.iterNumberedPages(resource, filter=query, maxpages=maxpages, workers=workers):
+                if items is None:
+                    self.logger.error("Sync of " + resource + " failed at page " + str(page) + ", watermark left at " + str(mark))
+                    return None
+                modified = self.store.upsert(resource, items)
+                if modified is not None and (newest is None or modified > newest):
+                    newest = modified
+                count += len(items)
+
+            if maxpages is not None:
+                # Records don't come back in modified_at order, so a capped
+                # sync may have skipped older changes. Don't move past them.
+                self.logger.info("Sync was limited to " + str(maxpages) + " pages, watermark left at " + str(mark))
+            else:
+                self.store.setWatermark(resource, filter, newest)
+            self.logger.info("Synced " + str(count) + " " + resource + " records, watermark now " + str(newest))
+            return count
+
+        except Exception:
+            self.logger.error("Sync of " + resource + " failed.", exc_info=True)
+            return None
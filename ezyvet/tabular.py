@@ -0,0 +1,135 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import csv
+import logging
+try:
+    from ezyvet.columnar import flatten
+    from ezyvet.localstore import unwrap
+    from ezyvet.resources import COLUMNS
+except ImportError:
+    from .columnar import flatten
+    from .localstore import unwrap
+    from .resources import COLUMNS
+
+class CsvExport:
+    """
+    Stream an endpoint to CSV (or TSV) as the pages arrive. Records are
+    flattened like ColumnarExport does, so nested fields become
+    "parent.child" columns. The header is the columns asked for or the
+    resource's list in resources.COLUMNS, so it is known before the first
+    page and is the same from run to run. Resources without an entry in
+    COLUMNS need the columns asked for. Fields outside the header are not
+    written; the ones that had a value are named in a warning at the end.
+
+        with open("invoices.csv", "w", newline="") as f:
+            CsvExport(e).write("/invoice", f, {"date": ...}, maxpages=None)
+
+    Attributes
+    ----------
+    e : ezyvet
+        An initialized ezyvet instance used to fetch the pages
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    """
+
+    def __init__(self, e, logger=None):
+        self.e = e
+        self.logger = logger or e.logger or logging.getLogger(__name__)
+
+    def header(self, url, columns=None):
+        """ The columns to write: the ones asked for, or the resource's
+            columns from resources.COLUMNS.
+
+            Raises
+            ------
+            ValueError
+                When no columns were asked for and the resource has no
+                entry in resources.COLUMNS.
+        """
+        if columns:
+            return list(columns)
+        if url not in COLUMNS:
+            raise ValueError("There is no column list for " + url + ", pick the columns to write (--columns).")
+        return list(COLUMNS[url])
+
+    def write(self, url, out, filter=None, maxpages=None, workers=None, columns=None, delimiter=",", maxrecords=None):
+        """ Write the records of an endpoint to an open file, one page at a time.
+            Parameters
+            ----------
+            url : string
+                URL of the API endpoint
+            out : file
+                Where the rows go, opened with newline=""
+            filter : dictonary
+                A dictionary of filter arguments to be used in the querystring.
+            maxpages : int
+                The maximum number of pages to fetch, None for all of them.
+            workers : int, optional
+                Pages fetched at the same time, see ezyvet.getData().
+            columns : list, optional
+                The columns to write, in order, e.g. ["id", "contact_id"]
+            delimiter : string, optional
+                "," for CSV, "\\t" for TSV
+            maxrecords : int, optional
+                The maximum number of records to write, instead of maxpages.
+
+            Returns
+            -------
+            int or None
+                The number of records written. None if a page failed, the
+                rows written before it stay in out.
+        """
+        try:
+            name = url.strip("/")
+            writer = csv.writer(out, delimiter=delimiter)
+            header = self.header(url, columns)                                  # fails before fetching anything
+            columns = set(header)
+            left = set()                                                        # fields with values that aren't in the header
+            count = 0
+            writer.writerow(header)
+            for items in self.e.iterPages(url, filter=filter, maxpages=maxpages, workers=workers, maxrecords=maxrecords):
+                if items is None:
+                    self.logger.error("CSV export of " + url + " stopped after " + str(count) + " records, a page could not be fetched.")
+                    return None
+                for item in items:
+                    row = flatten(unwrap(name, item))
+                    left.update(k for k, v in row.items() if v is not None and k not in columns)    # a null object is no column
+                    writer.writerow([cell(row.get(column)) for column in header])
+                    count += 1
+                out.flush()
+            if left:
+                self.logger.warning("Fields not in the header were not written: " + ", ".join(sorted(left)) + ". Pick the columns to write (--columns).")
+            self.logger.info("Wrote " + str(count) + " records of " + url)
+            return count
+
+        except BrokenPipeError:
+            raise
+        except ValueError as err:
+            self.logger.error(str(err))
+        except:
+            self.logger.error("CsvExport.write - something went wrong.", exc_info=True)
+
+def cell(value):
+    """ A value as CSV text: None is empty and booleans are true/false like the JSON. """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
@@ -0,0 +1,90 @@
+# Copyright (C) 2018 - DoveLewis
+# Author: Avi Solomon (asolomon@dovelewis.org)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__version__ = '0.1'
+__author__ = 'Avi Solomon (asolomon@dovelewis.org)'
+
+import logging
+import time
+try:
+    from ezyvet.ezhelpers import writeJson, readJson
+except ImportError:
+    from .ezhelpers import writeJson, readJson
+
+class TokenManager:
+    """
+    Keeps track of the lifetime of the access token stored in token.json.
+    The API reports how long a token lasts (expires_in), so when a token is
+    saved we also record when it was issued. While a token is known to be
+    fresh there is no need to spend a request testing it, and it can be
+    replaced shortly before it expires instead of failing mid-run.
+
+    Attributes
+    ----------
+    home_dir : string
+        Working directory the token file lives in (with trailing separator)
+    logger : the logger session
+        It makes more consistant logs to pass a logger session to the class
+    margin : int, optional
+        Seconds before expiry that a token stops counting as fresh
+    """
+
+    def __init__(self, home_dir, logger=None, margin=300):
+        self.filename = home_dir + "token.json"
+        self.logger = logger or logging.getLogger(__name__)
+        self.margin = margin
+
+    def load(self):
+        """ Read the stored token.
+
+            Returns
+            -------
+            dictonary or None
+                The stored token or None if there isn't one.
+        """
+        token = readJson(self.filename)
+        if token is not None and "access_token" not in token:
+            self.logger.info("Stored token file does not hold a token.")
+            return None
+        return token
+
+    def save(self, token):
+        """ Record when the token was issued and write it to the token file.
+
+            Returns
+            -------
+            dictonary
+                The token including its "issued_at" time.
+        """
+        token["issued_at"] = int(time.time())
+        writeJson(token, self.filename)
+        self.logger.info("Wrote token to " + self.filename)
+        return token
+
+    def expiresAt(self, token):
+        """ Return the unix time the token expires or None if we can't tell
+            (older token files were written without an issue time).
+        """
+        if token is None or "issued_at" not in token or "expires_in" not in token:
+            return None
+        return int(token["issued_at"]) + int(token["expires_in"])
+
+    def isFresh(self, token):
+        """ True when the token is known to be good for at least `margin`
+            more seconds.
+        """
+        expires = self.expiresAt(token)
+        return expires is not None and expires - self.margin > time.time()
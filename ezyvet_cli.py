@@ -17,20 +17,84 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from settings import *    # This file contains login credentials do not track with git
-from ezyvet import ezyvet
-from pprint import pprint,pformat
+# Only light modules are imported here so --help and bad options answer
+# quickly. settings, the library (and with it requests) and the optional
+# exporters are imported by the code paths that use them, see client().
+from ezyvet.resources import ENDPOINTS
 import logging
 import sys
+import os
 import getopt
 import json
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
+# Command line options that fetch a resource, mapped to the name used by the
+# library methods (getX / iterX) and the arguments those methods take:
+# "filter" (filter and maxpages), "max" (maxpages only) or "none".
+RESOURCES = {
+    "--address": ("Address", "filter"),
+    "--animal": ("Animal", "filter"),
+    "--animalColor": ("AnimalColor", "filter"),
+    "--appointment": ("Appointment", "filter"),
+    "--appointmentStatus": ("ApptStatus", "none"),
+    "--appointmentType": ("ApptType", "none"),
+    "--assessment": ("Assessment", "filter"),
+    "--attachment": ("Attachment", "filter"),
+    "--breeds": ("Breed", "filter"),
+    "--communication": ("Communication", "filter"),
+    "--consult": ("Consult", "filter"),
+    "--contact": ("Contact", "filter"),
+    "--contactDetail": ("ContactDetail", "filter"),
+    "--contactDetailType": ("ContactDetailType", "none"),
+    "--country": ("Country", "filter"),
+    "--diagnostic": ("Diagnostic", "filter"),
+    "--diagnosticResult": ("DiagnosticResult", "filter"),
+    "--diagnosticResultItem": ("DiagnosticResultItem", "filter"),
+    "--diagnosticRequest": ("DiagnosticRequest", "filter"),
+    "--diagnosticRequestItems": ("DiagnosticRequstItem", "filter"),
+    "--file": ("File", "filter"),
+    "--integratedDiagnostic": ("IntegratedDiagnostic", "filter"),
+    "--healthStatus": ("HealthStatus", "filter"),
+    "--history": ("History", "filter"),
+    "--invoice": ("Invoice", "filter"),
+    "--invoiceLine": ("InvoiceLine", "filter"),
+    "--operation": ("Operation", "filter"),
+    "--payment": ("Payment", "filter"),
+    "--paymentMethod": ("PaymentMethod", "filter"),
+    "--physicalExam": ("PhysicalExam", "filter"),
+    "--plan": ("Plan", "filter"),
+    "--prescription": ("Prescription", "filter"),
+    "--prescriptionItems": ("PrescriptionItem", "filter"),
+    "--presentingProblem": ("PresentingProblem", "filter"),
+    "--presentingProblemLink": ("PresentingProblemLink", "filter"),
+    "--product": ("Product", "filter"),
+    "--productGroup": ("ProductGroup", "filter"),
+    "--purchaseOrder": ("PurchaseOrder", "filter"),
+    "--purchaseOrderItem": ("PurchaseOrderItem", "filter"),
+    "--receiveInvoice": ("ReceiveInvoice", "filter"),
+    "--receiveInvoiceItem": ("ReceiveInvoiceItem", "filter"),
+    "--resource": ("Resource", "filter"),
+    "--separation": ("Separation", "filter"),
+    "--sex": ("Sex", "filter"),
+    "--species": ("Species", "filter"),
+    "--tag": ("Tag", "filter"),
+    "--tagCategory": ("TagCategory", "filter"),
+    "--therapeutic": ("Therapeutic", "filter"),
+    "--systemSetting": ("SystemSetting", "none"),
+    "--user": ("User", "filter"),
+    "--vaccination": ("Vaccination", "filter"),
+    "--webHookEvents": ("WebHookEvents", "max"),
+    "--webHooks": ("WebHooks", "max"),
+}
+
 def main():
     ''' Main function to parce commandline options
     '''
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])
+        return
     try:
         opts, args = getopt.getopt(
                         sys.argv[1:],
@@ -94,6 +158,18 @@ def main():
                                 "debug",
                                 "max=",
                                 "pretty",
+                                "ndjson",
+                                "resume",
+                                "expand=",
+                                "split=",
+                                "processes=",
+                                "parquet=",
+                                "csv",
+                                "tsv",
+                                "columns=",
+                                "fields=",
+                                "batch=",
+                                "server",
                             ]
                            )
     except getopt.GetoptError as err:
@@ -110,6 +186,8 @@ def main():
             sys.exit
 
         else:
+            loadSettings()
+
             # Setup debugging
             if any (i for i in ["-v", "--verbose"] if i in args):
                 logging.getLogger().setLevel(logging.INFO)
@@ -117,10 +195,10 @@ def main():
                 logging.getLogger().setLevel(logging.DEBUG)
 
             # Setup max records returned
-            max = 1                                             # Set to None or 1 (the library defaults to 1)
-            for o, a in opts:                                   # First find out if we have to set maxpages
+            max = None                                          # None for one page (the library default)
+            for o, a in opts:                                   # First find out if we have to set maxrecords
                 if o in ["--max", "-m"]:
-                    max = int(round(int(a))//10)                # round max records to nearest 10 then devide by to to get max pages
+                    max = int(a)                                # the library picks the page size
 
             logger.info("Limiting records to " + str(max))
 
@@ -129,6 +207,52 @@ def main():
             if any (i for i in ["--pretty", "-p"] if i in args):                              # How do they want the output formatted
                 pretty = True
                 logger.info("Setting formatting to pretty")
+            ndjson = False
+            if "--ndjson" in args:                                                            # Stream one record per line
+                ndjson = True
+                logger.info("Setting formatting to ndjson")
+            resume = "--resume" in args                                                       # Save pages as we go so a failed export can be resumed
+            expand = None
+            for o, a in opts:                                                                 # Related records to attach (appointment, consult, invoice)
+                if o == "--expand":
+                    expand = [i.strip() for i in a.split(",") if i.strip()]
+            split = None
+            processes = None
+            for o, a in opts:                                                                 # Export ranges of a field in several processes
+                if o == "--split":
+                    split = a.split(":")
+                elif o == "--processes":
+                    processes = int(a)
+            parquet = None
+            for o, a in opts:                                                                 # Write typed columns to a Parquet file
+                if o == "--parquet":
+                    parquet = a
+            delimiter = None
+            if "--csv" in args:                                                               # Stream rows with a stable header
+                delimiter = ","
+            elif "--tsv" in args:
+                delimiter = "\t"
+            columns = None
+            for o, a in opts:
+                if o == "--columns":
+                    columns = [i.strip() for i in a.split(",") if i.strip()]
+            fields = None
+            for o, a in opts:                                                                 # Keep only these fields of each record
+                if o == "--fields":
+                    fields = [i.strip() for i in a.split(",") if i.strip()]
+            if fields and (resume or split or parquet or delimiter):                          # these write whole records
+                logger.error("--fields can't be used with --resume, --split, --parquet, --csv or --tsv (pick CSV columns with --columns).")
+                usage()
+                sys.exit(2)
+            forward = None
+            if "--server" in args or SETTINGS.get("USE_SERVER") is True:                      # Ask a running "serve" daemon instead
+                from ezyvet import server
+                key = server.serverKey(str(SETTINGS["HOME_DIR"]))                          # only checked by servers on a port
+                if server.ping(serverAddress(), key=key):
+                    forward = serverAddress()
+                    logger.info("Forwarding queries to " + forward)
+                else:
+                    logger.info("No query server at " + serverAddress() + ", running the query here.")
 
             for o, a in opts:
                 if not a:
@@ -140,343 +264,396 @@ def main():
                             "-v",
                             "--pretty",
                             "--max",
+                            "--ndjson",
+                            "--resume",
+                            "--expand",
+                            "--split",
+                            "--processes",
+                            "--parquet",
+                            "--csv",
+                            "--tsv",
+                            "--columns",
+                            "--fields",
+                            "--server",
                             "-d",
                             "-p",
                             "-m"):
                     pass
 
+                elif o == "--batch":
+                    e = client()
+                    logger.info("Running the queries in " + a)
+                    runBatch(e, a, max, fields)
+
+                elif split and o in RESOURCES:
+                    e = client()
+                    logger.info("Exporting " + o[2:] + " split on " + split[0] + " with filter: " + str(a))
+                    exportSplit(e, o, json.loads(a), split, processes)
+
+                elif parquet and o in RESOURCES:
+                    e = client()
+                    logger.info("Writing " + o[2:] + " to " + parquet + " with filter: " + str(a))
+                    exportParquet(e, o, json.loads(a), max, parquet)
+
+                elif delimiter and o in RESOURCES:
+                    e = client()
+                    logger.info("Streaming " + o[2:] + " as CSV with filter: " + str(a))
+                    printCsv(e, o, json.loads(a), max, columns, delimiter)
+
+                elif resume and o in RESOURCES:
+                    e = client()
+                    logger.info("Exporting " + o[2:] + " with filter: " + str(a))
+                    exportResource(e, o, json.loads(a), max, pretty, ndjson)
+
+                elif forward and o in RESOURCES:
+                    name, kind = RESOURCES[o]
+                    logger.info("Asking " + forward + " for " + o[2:] + " with filter: " + str(a))
+                    query = {"resource": name, "filter": json.loads(a), "max": max, "fields": fields}
+                    if expand and name in ("Appointment", "Consult", "Invoice"):
+                        query["expand"] = expand
+                    data = server.ask(forward, query, key=key)
+                    if ndjson:
+                        printNdjson(data)
+                    else:
+                        printFormatted(data, pretty)
+
+                elif ndjson and o in RESOURCES:
+                    e = client()
+                    logger.info("Streaming " + o[2:] + " with filter: " + str(a))
+                    printNdjson(iterResource(e, o, json.loads(a), max, expand, fields))
+
                 elif o == "--address":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up animal with filter " +str(a) )
                     try:
-                        data = e.getAddress(filter = json.loads(a), maxpages=max)
+                        data = e.getAddress(filter = json.loads(a), maxrecords=max, fields=fields)
                         printFormatted(data, pretty)
                     except json.decoder.JSONDecodeError:
                         logger.error("The filter string supplied is invalid JSON, check the filter and try again.")
 
                 elif o == "--animal":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up animal with filter " +str(a) )
-                    data = e.getAnimal(filter = json.loads(a), maxpages=max)
+                    data = e.getAnimal(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--animalColor":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up animal color with filter " +str(a) )
-                    data = e.getAnimalColor(filter = json.loads(a), maxpages=max)
+                    data = e.getAnimalColor(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--appointment":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up appointments with filter: " + str(a))
-                    data = e.getAppointment(filter = json.loads(a), maxpages=max)
+                    data = e.getAppointment(filter = json.loads(a), maxrecords=max, expand=expand, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--appointmentStatus":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Getting ezyvet status.")
                     data =  e.getApptStatus()
                     printFormatted(data, pretty)
 
                 elif o == "--apptStatusLookup":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     data = lookupApptStatus(e,a)
                     printFormatted(data, pretty)
 
                 elif o == "--appointmentType":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Getting ezyvet appointment status.")
                     data =  e.getApptType()
                     printFormatted(data, pretty)
 
                 elif o == "--assessment":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up assessment with filter: " + str(a))
-                    data = e.getAssessment(filter = json.loads(a), maxpages=max)
+                    data = e.getAssessment(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--attachment":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up attachments with filter: " + str(a))
-                    data = e.getAttachment(filter = json.loads(a), maxpages=max)
+                    data = e.getAttachment(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--breed":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up breeds with filter: " + str(a))
-                    data = e.getBreed(filter = json.loads(a), maxpages=max)
+                    data = e.getBreed(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--communaction":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up communications with filter: " + str(a))
-                    data = e.getCommunication(filter = json.loads(a), maxpages=max)
+                    data = e.getCommunication(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--consult":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up consults with filter: " + str(a))
-                    data = e.getConsult(filter = json.loads(a), maxpages=max)
+                    data = e.getConsult(filter = json.loads(a), maxrecords=max, expand=expand, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--contact":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up contacts with filter: " + str(a))
-                    data = e.getContact(filter = json.loads(a), maxpages=max)
+                    data = e.getContact(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--contactDetail":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up contacts details with filter: " + str(a))
-                    data = e.getContactDetail(filter = json.loads(a), maxpages=max)
+                    data = e.getContactDetail(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--contactDetailType":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up contact detail types")
                     data = e.getContactDetailType()
                     printFormatted(data, pretty)
 
                 elif o == "--country":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up countries with filter: " + str(a))
-                    data = e.getCountry(filter = json.loads(a), maxpages=max)
+                    data = e.getCountry(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--diagnostic":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up diagnostics with filter: " + str(a))
-                    data = e.getDiagnostic(filter = json.loads(a), maxpages=max)
+                    data = e.getDiagnostic(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--diagnosticResult":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up diagnostic results with filter: " + str(a))
-                    data = e.getDiagnosticResult(filter = json.loads(a), maxpages=max)
+                    data = e.getDiagnosticResult(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--diagnosticResultItem":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up diagnostic results item with filter: " + str(a))
-                    data = e.getDiagnosticResultItem(filter = json.loads(a), maxpages=max)
+                    data = e.getDiagnosticResultItem(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--diagnosticRequest":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up diagnostic requests with filter: " + str(a))
-                    data = e.getDiagnosticRequest(filter = json.loads(a), maxpages=max)
+                    data = e.getDiagnosticRequest(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--diagnosticRequestItem":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up diagnostic request items with filter: " + str(a))
-                    data = e.getDiagnosticRequestItems(filter = json.loads(a), maxpages=max)
+                    data = e.getDiagnosticRequestItems(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--getFile":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up files with filter: " + str(a))
-                    data = e.getFile(filter = json.loads(a), maxpages=max)
+                    data = e.getFile(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--getIntegratedDiagnostic":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up integrated diagnostics with filter: " + str(a))
-                    data = e.getintegratedDiagnostic(filter = json.loads(a), maxpages=max)
+                    data = e.getintegratedDiagnostic(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--healthStatus":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up health status with filter: " + str(a))
-                    data = e.getHealthStatus(filter = json.loads(a), maxpages=max)
+                    data = e.getHealthStatus(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--history":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up histories with filter: " + str(a))
-                    data = e.getHistory(filter = json.loads(a), maxpages=max)
+                    data = e.getHistory(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--invoice":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up invoices with filter: " + str(a))
-                    data = e.getInvoice(filter = json.loads(a), maxpages=max)
+                    data = e.getInvoice(filter = json.loads(a), maxrecords=max, expand=expand, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--invoiceLine":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up invoice lines with filter: " + str(a))
-                    data = e.getInvoiceLine(filter = json.loads(a), maxpages=max)
+                    data = e.getInvoiceLine(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--operation":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up operations with filter: " + str(a))
-                    data = e.getOperation(filter = json.loads(a), maxpages=max)
+                    data = e.getOperation(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--payment":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up payments with filter: " + str(a))
-                    data = e.getPayment(filter = json.loads(a), maxpages=max)
+                    data = e.getPayment(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--paymentMethod":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up payment menthods with filter: " + str(a))
-                    data = e.getPaymentMethod(filter = json.loads(a), maxpages=max)
+                    data = e.getPaymentMethod(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--physicalExam":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up physical exams with filter: " + str(a))
-                    data = e.getphysicalExam(filter = json.loads(a), maxpages=max)
+                    data = e.getphysicalExam(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--plan":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up plans with filter: " + str(a))
-                    data = e.getPlan(filter = json.loads(a), maxpages=max)
+                    data = e.getPlan(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--prescription":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up prescriptions with filter: " + str(a))
-                    data = e.getPrescription(filter = json.loads(a), maxpages=max)
+                    data = e.getPrescription(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--prescriptionItems":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up prescriptions items with filter: " + str(a))
-                    data = e.getPrescriptionItems(filter = json.loads(a), maxpages=max)
+                    data = e.getPrescriptionItems(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--presentingProblem":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up presenting problems with filter: " + str(a))
-                    data = e.getPresentingProblem(filter = json.loads(a), maxpages=max)
+                    data = e.getPresentingProblem(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--presentingProblemLink":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up presenting problem links with filter: " + str(a))
-                    data = e.getPresentingProblemLink(filter = json.loads(a), maxpages=max)
+                    data = e.getPresentingProblemLink(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--product":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up products with filter: " + str(a))
-                    data = e.getProduct(filter = json.loads(a), maxpages=max)
+                    data = e.getProduct(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--productGroup":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up product groups with filter: " + str(a))
-                    data = e.getProductGroup(filter = json.loads(a), maxpages=max)
+                    data = e.getProductGroup(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--purchaseOrder":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up Purchase Orders with filter: " + str(a))
-                    data = e.getPurchaseOrder(filter = json.loads(a), maxpages=max)
+                    data = e.getPurchaseOrder(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--purchaseOrderItem":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up Purchase Order Items with filter: " + str(a))
-                    data = e.getPurchaseOrderItem(filter = json.loads(a), maxpages=max)
+                    data = e.getPurchaseOrderItem(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--receiveInvoice":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up Receive Invoices with filter: " + str(a))
-                    data = e.getReceiveInvoice(filter = json.loads(a), maxpages=max)
+                    data = e.getReceiveInvoice(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--receiveInvoiceItem":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up Receive Invoice Items with filter: " + str(a))
-                    data = e.getReceiveInvoiceItem(filter = json.loads(a), maxpages=max)
+                    data = e.getReceiveInvoiceItem(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--resource":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up resources with filter: " + str(a))
-                    data = e.getResource(filter = json.loads(a), maxpages=max)
+                    data = e.getResource(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--separation":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up separations with filter: " + str(a))
-                    data = e.getSeparation(filter = json.loads(a), maxpages=max)
+                    data = e.getSeparation(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--sex":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up sexes with filter: " + str(a))
-                    data = e.getSex(filter = json.loads(a), maxpages=max)
+                    data = e.getSex(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--species":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up species with filter: " + str(a))
-                    data = e.getSpecies(filter = json.loads(a), maxpages=max)
+                    data = e.getSpecies(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--tag":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up tags with filter: " + str(a))
-                    data = e.getTag(filter = json.loads(a), maxpages=max)
+                    data = e.getTag(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--tagCategory":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up tag categories with filter: " + str(a))
-                    data = e.getTagCategory(filter = json.loads(a), maxpages=max)
+                    data = e.getTagCategory(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--therapeutic":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up therapeutics with filter: " + str(a))
-                    data = e.getTherapeutic(filter = json.loads(a), maxpages=max)
+                    data = e.getTherapeutic(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--systemSetting":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up system settings")
                     data = e.getSystemSetting()
                     printFormatted(data, pretty)
 
                 elif o == "--user":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up users with filter: " + str(a))
-                    data = e.getUser(filter = json.loads(a), maxpages=max)
+                    data = e.getUser(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--vaccination":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up vaccinationd with filter: " + str(a))
-                    data = e.getVaccination(filter = json.loads(a), maxpages=max)
+                    data = e.getVaccination(filter = json.loads(a), maxrecords=max, fields=fields)
                     printFormatted(data, pretty)
 
                 elif o == "--webHookEvents":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up webhook events.")
-                    data = e.getWebHookEvents(maxpages=max)
+                    data = e.getWebHookEvents(maxpages=pagesFor(max))
                     printFormatted(data, pretty)
 
                 elif o == "--webHooks":
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Looking up webhooks.")
-                    data = e.getWebHooks(maxpages=max)
+                    data = e.getWebHooks(maxpages=pagesFor(max))
                     printFormatted(data, pretty)
 
                 elif o == "-T":                                 # Test the connection to ezyvet
-                    e = ezyvet.ezyvet(SETTINGS, logger)
+                    e = client()
                     logger.info("Testing connection to ezyVet API complete.")
 
                 else:
-                    msg = "Unknown option: " + pformat(o)
+                    msg = "Unknown option: " + repr(o)
                     logger.error(str(msg))
                     usage()
                     sys.exit
@@ -484,9 +661,27 @@ def main():
     except json.decoder.JSONDecodeError:
         logger.error("The JSON supplied argument (filter) was malformed. Make sure JSON property names are double quoted. Example: '{\"name\":\"foo\"}'")
 
+    except SystemExit:                      # exit codes from the export helpers
+        raise
+
     except:
         logger.error("Something went wrong. Please report issues to asolomon@dovelewis.org.", exc_info=True)
 
+def loadSettings():
+    """ Import SETTINGS from settings.py, the file with the login
+        credentials (do not track it with git). Left until an option needs
+        it, so usage is printed even before the file has been written.
+    """
+    global SETTINGS
+    from settings import SETTINGS
+
+def client():
+    """ A new ezyvet instance. The library, requests and the JSON
+        backends are imported here rather than at startup.
+    """
+    from ezyvet import ezyvet
+    return ezyvet.ezyvet(SETTINGS, logger)
+
 def printFormatted(data, pretty):
     """
     Format output then print on screen.
@@ -494,10 +689,219 @@ def printFormatted(data, pretty):
     if not data:
         return None
     elif pretty is True:
+        from pprint import pprint
         pprint(data)            # Make human readable
     else:
         print(json.dumps(data)) # output JSON
 
+def pagesFor(max):
+    """ Pages needed for max records at the PAGE_SIZE setting, for the
+        methods that take maxpages. One page when no max was given.
+    """
+    if max is None:
+        return 1
+    from ezyvet.query import pageSize, MAX_LIMIT
+    size = pageSize(SETTINGS.get("PAGE_SIZE", MAX_LIMIT)) or 10
+    return -(-max // size)
+
+def iterResource(e, option, filter, max, expand=None, fields=None):
+    """ Given a ezyvet instance and a resource option from RESOURCES, return
+        the library iterator for it. Expanded records need the whole batch
+        first, so with expand the records come from the get method instead.
+    """
+    name, kind = RESOURCES[option]
+    if expand and name in ("Appointment", "Consult", "Invoice"):
+        data = getattr(e, "get" + name)(filter=filter, maxrecords=max, expand=expand, fields=fields)
+        if data is None:
+            raise IOError("The " + name + " records could not be fetched.")
+        return data
+    method = getattr(e, "iter" + name)
+    if kind == "filter":
+        return method(filter=filter, maxrecords=max, fields=fields)
+    elif kind == "max":
+        return method(maxpages=pagesFor(max))
+    return method()
+
+def exportResource(e, option, filter, max, pretty, ndjson):
+    """ Fetch a resource with the resumable exporter, then print the saved
+        records. If the export fails the pages fetched so far are kept, and
+        running the same command again carries on from where it stopped.
+    """
+    from ezyvet import exporter
+    name, kind = RESOURCES[option]
+    url, kind, maxpages = ENDPOINTS[name]
+    maxrecords = None
+    if kind != "filter":
+        filter = None
+    if kind == "filter" and max is not None:
+        maxrecords = max                            # the page size follows it
+    elif kind != "none":
+        maxpages = pagesFor(max)
+    x = exporter.Exporter(e, logger)
+    if not x.run(url, filter=filter, maxpages=maxpages, resume=True, maxrecords=maxrecords):
+        logger.error("The export did not finish. Run the same command again to resume it.")
+        sys.exit(1)
+    if ndjson:
+        printNdjson(x.records())
+    else:
+        printFormatted(list(x.records()), pretty)
+    x.clear()
+
+def exportSplit(e, option, filter, split, processes):
+    """ Export a resource in ranges of a field with several processes, then
+        print the merged records as ndjson. Finished ranges are kept if any
+        range fails, running the same command again only fetches the rest.
+    """
+    from ezyvet import exporter
+    name, kind = RESOURCES[option]
+    url = ENDPOINTS[name][0]
+    if kind != "filter" or len(split) != 3:
+        logger.error("--split needs a resource that takes a filter and a range like created_at:1514764800:1546300800")
+        sys.exit(2)
+    field, start, stop = split
+    output = os.path.join(e.home_dir, "exports", name + "-" + str(os.getpid()) + ".ndjson")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    x = exporter.ParallelExporter(e, processes, logger)
+    if not x.run(url, filter, field, int(start), int(stop), output):
+        logger.error("The export did not finish. Run the same command again to resume it.")
+        sys.exit(1)
+    try:
+        with open(output) as f:
+            for line in f:
+                sys.stdout.write(line)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        sys.stderr.close()
+    finally:
+        os.remove(output)
+
+def exportParquet(e, option, filter, max, filename):
+    """ Stream a resource into a Parquet file, see columnar.ColumnarExport. """
+    from ezyvet import columnar
+    name, kind = RESOURCES[option]
+    url, kind, maxpages = ENDPOINTS[name]
+    if kind != "filter":
+        filter = None
+    if kind != "none":
+        maxpages = pagesFor(max)
+    if columnar.pyarrow is None:
+        logger.error("--parquet needs pyarrow, install it with: pip install pyarrow")
+        sys.exit(2)
+    if not columnar.ColumnarExport(e, logger).parquet(url, filename, filter=filter, maxpages=maxpages, maxrecords=max if kind != "none" else None):
+        sys.exit(1)
+
+def printCsv(e, option, filter, max, columns, delimiter):
+    """ Stream a resource to stdout as CSV or TSV, see tabular.CsvExport. """
+    from ezyvet import tabular
+    name, kind = RESOURCES[option]
+    url, kind, maxpages = ENDPOINTS[name]
+    if kind != "filter":
+        filter = None
+    if kind != "none":
+        maxpages = pagesFor(max)
+    try:
+        if tabular.CsvExport(e, logger).write(url, sys.stdout, filter=filter, maxpages=maxpages, columns=columns, delimiter=delimiter,
+                                                 maxrecords=max if kind != "none" else None) is None:
+            sys.exit(1)
+    except BrokenPipeError:                 # the reader went away (e.g. piped to head)
+        sys.stderr.close()
+
+def runBatch(e, filename, max, fields):
+    """ Run one query per line of a JSON lines file (- for stdin) with one
+        client, several at a time, and print one JSON line per query as it
+        finishes, tagged with the input line number:
+
+            {"resource": "invoice", "filter": {"contact_id": 12}, "max": 500}
+            {"resource": "--appointment", "filter": {}, "expand": ["animal"]}
+
+        A line can also set "fields", -m and --fields are the defaults.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    f = sys.stdin if filename == "-" else open(filename)
+    with f:
+        queries = [(n, line) for n, line in enumerate(f, 1) if line.strip()]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=int(SETTINGS.get("PAGE_WORKERS", 4))) as pool:
+        futures = {pool.submit(batchQuery, e, line, max, fields): n for n, line in queries}
+        for future in as_completed(futures):
+            n = futures[future]
+            try:
+                result = {"line": n, "items": future.result()}
+            except Exception as err:
+                failed += 1
+                result = {"line": n, "error": str(err)}
+            try:
+                sys.stdout.write(json.dumps(result) + "\n")
+                sys.stdout.flush()
+            except BrokenPipeError:         # the reader went away (e.g. piped to head)
+                sys.stderr.close()
+                return
+    if failed:
+        logger.error(str(failed) + " of " + str(len(queries)) + " queries failed.")
+        sys.exit(1)
+
+def batchQuery(e, line, max, fields):
+    """ Run one --batch query and return its records. """
+    query = json.loads(line)
+    resource = str(query.get("resource", "")).strip("-/")
+    option = next((o for o in RESOURCES if o[2:].lower() == resource.lower()), None)
+    if option is not None:                                              # CLI option names, e.g. "breeds"
+        query["resource"] = RESOURCES[option][0]
+    from ezyvet import server
+    return server.runQuery(e, query, max, fields)
+
+def serverAddress():
+    """ Where "serve" listens and --server forwards to, see SERVER_ADDRESS. """
+    return SETTINGS.get("SERVER_ADDRESS") or "unix:" + os.path.join(str(SETTINGS["HOME_DIR"]), "ezyvet.sock")
+
+def serve(argv):
+    """ ezyvet_cli.py serve [-v|-d] [--listen <address>]
+        Keep a client warm and answer queries from --server and --batch
+        style callers, see server.QueryServer.
+    """
+    try:
+        opts, args = getopt.getopt(argv, "vd", ["listen=", "verbose", "debug"])
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+    loadSettings()
+    from ezyvet import server
+    import signal
+    address = serverAddress()
+    for o, a in opts:
+        if o in ("-v", "--verbose"):
+            logging.getLogger().setLevel(logging.INFO)
+        elif o in ("-d", "--debug"):
+            logging.getLogger().setLevel(logging.DEBUG)
+        elif o == "--listen":
+            address = a
+    e = client()
+    q = server.QueryServer(e, address, logger)
+    try:
+        q.bind()
+    except (OSError, ValueError) as err:
+        logger.error("Can't listen on " + address + ": " + str(err))
+        sys.exit(2)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))   # clean up the socket on kill too
+    print("Answering queries on " + address, file=sys.stderr)
+    q.run()
+
+def printNdjson(records):
+    """
+    Print one JSON record per line as they arrive, flushing as we go so the
+    output can be piped to other tools while pages are still being fetched.
+    Exits 1 if the records stop short because a page could not be fetched.
+    """
+    try:
+        for record in records:
+            sys.stdout.write(json.dumps(record) + "\n")
+            sys.stdout.flush()
+    except BrokenPipeError:                 # the reader went away (e.g. piped to head)
+        sys.stderr.close()
+    except IOError:                         # already logged by iterData
+        sys.exit(1)
+
 def usage():
     s = """
     ezyVet CLI by DoveLewis
@@ -506,15 +910,48 @@ def usage():
     Version 0.3.0
 
     Usage:
-        python3 ezyvet_cli.py [-v|-d][-p][-m <number>] [OPTION] <filter>
+        python3 ezyvet_cli.py [-v|-d][-p|--ndjson][-m <number>] [OPTION] <filter>
+        python3 ezyvet_cli.py serve [-v|-d] [--listen <address>]
 
     Modifiers:
         -v                                      Verbose output
         -d, --debug                             Very verbose output
         -p, --pretty                            Human readable output
-        -m, --max <number>                      Set the max records returned
-                                                (rounded to nearest 10)
-                                                DEFAULT 1
+        --ndjson                                Stream one JSON record per line
+                                                as pages arrive
+        --resume                                Save pages under HOME_DIR as they
+                                                arrive. If the export fails, run
+                                                the same command to resume it
+        --expand <relation,...>                 Attach related records to each
+                                                appointment, consult or invoice,
+                                                e.g. --expand contact,lines
+        --split <field>:<from>:<to>             Export in ranges of an id or date
+                                                field (unix time) in several
+                                                processes, merged in order and
+                                                printed as ndjson
+        --processes <number>                    Processes for --split
+                                                DEFAULT number of CPUs
+        --parquet <file>                        Write the records to a Parquet
+                                                file as typed columns (needs
+                                                pyarrow)
+        --csv, --tsv                            Stream the records as CSV or TSV
+                                                rows with a stable header
+        --columns <name,...>                    The CSV columns to write, in order
+        --fields <name,...>                     Keep only these fields of each
+                                                record, e.g. --fields id,modified_at
+                                                (not with --resume, --split,
+                                                --parquet, --csv or --tsv)
+        --batch <file>                          Run one query per line of a JSON
+                                                lines file (- for stdin) over one
+                                                session and print one result line
+                                                per query, tagged by line number
+        --server                                Ask the running "serve" daemon
+                                                (see SERVER_ADDRESS), or run the
+                                                query here if there isn't one
+        -m, --max <number>                      Set the max records returned,
+                                                fetched PAGE_SIZE (up to 200)
+                                                records per request
+                                                DEFAULT one page
     Options:
         -h, --help                              Get Help (print this)
         --address <filter>                      Fetch address(es)
@@ -591,18 +1028,5 @@ def lookupApptStatus(e, lookup):
     return(code)
 
 
-def round( n ):
-    """ return n rounded to the number to nearest 10
-    """
-    logger.debug("Rounding " + str(n))
-    if n < 10:
-        logger.debug("Less than 10 returning 10 ")
-        return 10
-
-    a = (n // 10) * 10  # Smaller multiple
-    b = a + 10 # Larger multiple
-    logger.debug("Round val a = " + str(a) + " val b = " + str(b))
-    return (b if n - a > b - n else a) # Return of closest of two
-
 if __name__ == "__main__":
     main()
@@ -12,8 +12,26 @@ SETTINGS = {
     "CLIENT_ID":"",
     "CLIENT_SECRET":"",
     "HOME_DIR":"/home/user/.ezyvetcli",                      # This should be somewhere secure
-    "USE_CACHE":False,                                       # Do you want to locally cache API responses for testing
-    "CACHE_EXPIRE":300,                                      # if caching is on, time to expire in ms
+    "USE_CACHE":False,                                       # Do you want to locally cache API responses
+    "CACHE_EXPIRE":300,                                      # if caching is on, seconds pages are kept (see ezyvet/cache.py for per endpoint times)
+    "CACHE_TTLS":{},                                         # Per endpoint cache seconds, e.g. {"/appointment": 10}
+    "CACHE_MAX_ENTRIES":10000,                               # Most pages cached, least recently used go first
+    "REFERENCE_REFRESH":3600,                                # Seconds lookup tables (statuses, species, ...) are kept in memory
+    "MAX_URL_LENGTH":2000,                                   # Longest request URL fetchByIds will build
+    "JSON_DECODER":"auto",                                   # orjson, ujson or json, auto uses the fastest one installed
+    "PAGE_WORKERS":4,                                        # Pages fetched at the same time by getData
+    "PAGE_SIZE":200,                                         # Records asked for per page, the API allows up to 200
+    "PAGE_RETRIES":3,                                        # Attempts made at each page before giving up
+    "POOL_CONNECTIONS":10,                                   # Number of hosts the HTTP session keeps connection pools for
+    "POOL_MAXSIZE":10,                                       # Keep-alive connections per host, keep this >= PAGE_WORKERS
+    "TOKEN_REFRESH_MARGIN":300,                              # Seconds before expiry the access token is replaced
+    "RATE_LIMIT":60,                                         # Requests per minute shared by every process on this host, 0 for no limit
+    "RATE_BURST":10,                                         # Requests allowed back to back before RATE_LIMIT applies
+    "MAX_BACKOFF":60,                                        # Longest wait in seconds between retries of a page
+    "USE_MIRROR":False,                                      # Keep a local SQLite copy of fetched records and read from it when fresh
+    "MIRROR_MAX_AGE":3600,                                   # Seconds a mirrored record counts as fresh
+    "SERVER_ADDRESS":"",                                     # Where "ezyvet_cli.py serve" listens, "unix:<path>" or "127.0.0.1:<port>", empty for HOME_DIR/ezyvet.sock
+    "USE_SERVER":False,                                      # Send CLI queries to a running "serve" daemon when there is one
     "SCOPE":[
         "read-address",
         "read-animal",